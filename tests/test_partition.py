@@ -0,0 +1,80 @@
+import io
+from xml.etree import ElementTree
+
+from PIL import Image
+
+from ui_action_automator import UIActionAutomator
+from utils.data_saver import DataSaver
+from utils.settle_waiter import SettleWaiter
+from utils.state_graph import element_key, element_partition
+
+WRAPPER = '<node class="android.widget.FrameLayout" clickable="true" bounds="[0,100][1440,400]">%s</node>'
+CHILD = '<node class="android.widget.Button" resource-id="app:id/button%d" clickable="true" bounds="[600,200][1000,300]"/>'
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+class FakeDriver:
+    """화면이 바뀌지 않는 driver, gesture를 보낸 좌표만 기록"""
+
+    capabilities = {"appPackage": "fake.app"}
+    current_package = "fake.app"
+    current_activity = ".Main"
+
+    def __init__(self, page_source):
+        self.page_source = page_source
+        self.points = []
+        image = io.BytesIO()
+        Image.new("RGB", (1440, 3120)).save(image, "PNG")
+        self.screenshot = image.getvalue()
+
+    def get_screenshot_as_png(self):
+        return self.screenshot
+
+    def execute(self, command, params=None):
+        move = next(item for item in params["actions"][0]["actions"] if item["type"] == "pointerMove")
+        self.points.append((move["x"], move["y"]))
+        return {"value": None}
+
+    def press_keycode(self, keycode):
+        pass
+
+    def activate_app(self, package):
+        pass
+
+
+# wrapper와 child의 element key가 서로 다른 partition에 들어가는 화면
+def split_hierarchy():
+    for number in range(100):
+        hierarchy = f'<hierarchy>{WRAPPER % (CHILD % number)}</hierarchy>'
+        wrapper = ElementTree.fromstring(hierarchy)[0]
+        if element_partition(element_key(wrapper), 2) != element_partition(element_key(wrapper[0]), 2):
+            return hierarchy
+    raise AssertionError("서로 다른 partition에 들어가는 key를 찾지 못함")
+
+
+def test_wrapper_and_child_in_different_partitions(tmp_path):
+    hierarchy = split_hierarchy()
+    tested = []
+    for index in range(2):
+        driver = FakeDriver(hierarchy)
+        clock = FakeClock()
+        automator = UIActionAutomator(
+            driver, settle_waiter=SettleWaiter(driver, clock=clock, sleep=clock.sleep),
+            data_saver=DataSaver(str(tmp_path / str(index)))
+        )
+        automator.run_test_on_ui_elements(partition=(index, 2))
+        tested.append(set(driver.points))
+
+    # wrapper의 중심은 child 안 -> wrapper의 action은 제거되고 child만 한 디바이스에서 테스트
+    assert all((720, 250) not in points for points in tested)
+    assert sum((800, 250) in points for points in tested) == 1
@@ -1,210 +1,489 @@
-import time
-import re
-import numpy as np
-from PIL import Image
-from appium import webdriver
-from appium.options.android import UiAutomator2Options
+import os
+import logging
 from utils.element_finder import ElementFinder
-from utils.gesture_handler import GestureHandler
+from utils.gesture_handler import GestureHandler, swipe_vector, SWIPE_VELOCITY, FLING_VELOCITY
+from utils.element_index import (
+    FLAG_CLICKABLE, FLAG_LONG_CLICKABLE, FLAG_SCROLLABLE, FLAG_SCALABLE, FLAG_PINCH_CLASS, parse_bounds
+)
 from utils.data_saver import DataSaver
+from utils.view_snapshot import ViewSnapshot
+from utils.screenshot import Screenshot
+from utils.settle_waiter import SettleWaiter
+from utils.screen_diff import ScreenDiff
+from utils.state_graph import StateGraph, element_key, element_partition
+from utils.change_classifier import ChangeClassifier
+from utils.element_scheduler import ElementScheduler, ChangeYieldModel
+from utils.session_pool import DeviceEndpoint, SessionDriver, SESSION_ERRORS
+from utils.crawl_metrics import metrics, configure as configure_metrics
+
+logger = logging.getLogger(__name__)
+
+# 수행할 gesture 종류 (action 이름은 "swipe_up", "pinch_zoom_in"처럼 gesture 이름으로 시작)
+DEFAULT_GESTURES = ("tap", "double_tap", "long_press", "swipe", "fling", "pinch_zoom", "pan")
+
+# pinch / pan은 두 손가락이 들어갈 만큼 큰 element에만 수행
+MIN_MULTI_TOUCH_SIZE = 300
+
+# 화면 내용을 움직이는 gesture (element 위치가 바뀌면 남은 element의 좌표가 맞지 않음)
+SCROLL_GESTURES = ("swipe_", "fling_", "pan")
+OPPOSITE_DIRECTIONS = {"up": "down", "down": "up", "left": "right", "right": "left"}
+
 
 class UIActionAutomator:
-    def __init__(self, driver):
+    # keep_unchanged=True면 변화가 없는 sample도 저장 (학습용 negative sample)
+    # same_screen_threshold: 구조 fingerprint 유사도가 이 값 이상이면 같은 화면으로 판단
+    # state_graph: 이미 테스트한 (화면, element, action)을 기록 / 건너뛰는 그래프 (기본: dataset/state_graph.jsonl)
+    # gestures: 테스트할 gesture 종류 (기본: DEFAULT_GESTURES 전체)
+    # element_scheduler: 테스트 순서 결정 (기본: dataset / 그래프에서 학습한 변화 확률 순)
+    # change_classifier: 변화 종류(new_screen / dialog / toggle / media_only / no_op) 분류
+    #   -> sample 저장 여부와 원래 화면으로 돌아갈지 여부를 결정
+    def __init__(self, driver, settle_waiter=None, data_saver=None, screen_diff=None, keep_unchanged=False,
+                 same_screen_threshold=0.95, state_graph=None, gestures=DEFAULT_GESTURES, element_scheduler=None,
+                 change_classifier=None):
         self.driver = driver
-        self.action_handler = GestureHandler(driver)
         self.element_finder = ElementFinder(driver)
-        self.data_saver = DataSaver()
+        # gesture를 보낼 때마다 element 캐시를 stale로 표시
+        self.action_handler = GestureHandler(driver, listeners=[self.element_finder.invalidate])
+        self.data_saver = data_saver or DataSaver()
+        # status bar / navigation bar 높이는 디바이스에서 가져옴
+        self.screen_diff = screen_diff or ScreenDiff.from_driver(driver)
+        # 같은 ScreenDiff를 쓰면 settle-wait에서 만든 축소 배열을 변화 감지에서 재사용
+        self.settle_waiter = settle_waiter or SettleWaiter(driver, screen_diff=self.screen_diff)
+        self.change_classifier = change_classifier or ChangeClassifier()
+        self.keep_unchanged = keep_unchanged
+        self.same_screen_threshold = same_screen_threshold
+        self.gestures = tuple(gestures)
+        self.state_graph = state_graph or StateGraph(os.path.join(self.data_saver.base_dir, "state_graph.jsonl"))
+        self.element_scheduler = element_scheduler or ElementScheduler(
+            ChangeYieldModel.from_sources(self.data_saver.base_dir, self.state_graph)
+        )
         self.app_name = self.driver.capabilities.get("appPackage", "unknown_app")
         self.initial_view_hierarchy = None
+        self.navigate_steps = []
+        self.navigator = None
 
     def ensure_app_running(self):
         """앱이 실행 중인지 확인하고, 실행되지 않았다면 실행"""
-        print(f"🔍 현재 실행 중인 앱: {self.driver.current_package}")
-        print(f"🔍 현재 실행 중인 액티비티: {self.driver.current_activity}")
+        logger.debug("🔍 현재 실행 중인 앱: %s", self.driver.current_package)
+        logger.debug("🔍 현재 실행 중인 액티비티: %s", self.driver.current_activity)
               
         try:
             current_package = self.driver.current_package
             if current_package != self.app_name:
-                print(f"🚀 {self.app_name} 앱 실행 중...")
+                logger.info("🚀 %s 앱 실행 중...", self.app_name)
                 self.driver.activate_app(self.app_name)
-                time.sleep(5)  # 앱 실행 대기
+                self.wait_for_settle("launch")  # 앱 실행 대기
                 return True
             return True
         except Exception as e:
-            print(f"⚠️ 앱 실행 확인 중 오류 발생: {e}")
+            logger.warning("⚠️ 앱 실행 확인 중 오류 발생: %s", e)
             return False
         
-    # 스크린샷 촬영 및 저장
-    def take_screenshot(self, action_name, stage="before", element_id=None, bounds=None):
-        # 스크린샷 저장
-        screenshot_path = self.data_saver.save_screenshot(self.driver, self.app_name, action_name, stage)
-
-        # view hierarchy 저장
-        self.data_saver.save_view_hierarchy(self.driver, self.app_name, action_name, stage)
+    # 화면이 안정될 때까지 대기하고 실제 대기 시간을 로그로 남김
+    def wait_for_settle(self, label):
+        result = self.settle_waiter.wait(label)
+        if result.stable:
+            logger.debug("⏱️ [%s] 화면 안정화: %.2f초 대기 (poll %d회)", label, result.waited, result.polls)
+        else:
+            logger.warning("⚠️ [%s] 화면이 안정되지 않음: timeout %.2f초", label, result.waited)
+        return result
 
-        # simplified view hierarchy 저장
-        self.data_saver.save_simplified_view_hierarchy(self.driver, self.app_name, action_name, stage)
+    # config.json의 navigate 단계를 재생해서 테스트할 화면으로 이동
+    # 마지막 단계의 settle 결과 반환 (단계가 없으면 None)
+    def navigate(self, steps):
+        settle = None
+        for step in steps:
+            coords = parse_bounds(step.get("bounds"))
+            if step.get("action", "tap") != "tap" or coords is None:
+                logger.warning("⚠️ 지원하지 않는 navigate 단계: %s", step)
+                continue
+            x1, y1, x2, y2 = coords
+            self.action_handler.perform_tap((x1 + x2) // 2, (y1 + y2) // 2)
+            settle = self.wait_for_settle("navigate")
+        return settle
 
-        # action data 저장
-        self.data_saver.save_action_data(self.app_name, action_name, element_id, bounds)
+    # 테스트 중인 화면으로 이동 (navigator가 있으면 캐시된 가장 짧은 경로 사용)
+    def enter_screen(self):
+        if self.navigator is not None:
+            self.navigator.enter(self.navigate_steps)
+        else:
+            self.navigate(self.navigate_steps)
 
-        print(f"스크린샷 저장됨: {screenshot_path}")
-        return screenshot_path
+    # 스크린샷 촬영 (메모리)
+    # page_source는 stage 당 한 번만 가져와서 xml / simplified json / 변화 감지에 공유
+    # 디스크 저장은 변화가 감지되어 샘플을 남길 때만 save_sample()에서 수행
+    def take_screenshot(self, snapshot=None, screenshot=None):
+        # settle-wait에서 가져온 screenshot / snapshot이 있으면 재사용
+        if screenshot is None:
+            screenshot = Screenshot.from_driver(self.driver)
+        if snapshot is None:
+            snapshot = ViewSnapshot.from_driver(self.driver)
+        return screenshot, snapshot
 
-    def clear_data(self, app_name, action):
-        self.data_saver.delete_data(app_name, action)
+    # before / after 캡처와 action data를 디스크에 저장
+    def save_sample(self, action_name, before, after, element_id=None, bounds=None, settle_time=None, extra=None,
+                    on_saved=None):
+        captures = [("before", *before), ("after", *after)]
+        index_dir = self.data_saver.save_sample(
+            self.app_name, action_name, captures, element_id, bounds, settle_time=settle_time, extra=extra,
+            on_saved=on_saved
+        )
+        logger.debug("스크린샷 저장됨: %s", index_dir)
+        return index_dir
 
     # 이미지 비교
-    # TODO: 상단 status bar 영역을 제외하고 비교 -> 시간 혹은 배터리 상태 등이 달라져도 무시
+    # status bar / nav bar와 hierarchy에서 찾은 애니메이션 element 영역은 제외하고 비교
     # TODO: action에 의한 유의미한 변화를 감지해야 됨 -> 동영상 플레이어의 경우, 동영상이 재생되어도 화면에 변화가 없음 -> 어떻게 해결할 것인가?
     # TODO: 단순한 이미지 비교로는 부족함 -> OCR을 이용하여 텍스트 비교, 픽셀 단위 비교 등을 고려해야 함
-    def compare_images(self, img1_path, img2_path):
-        image1 = Image.open(img1_path)
-        image2 = Image.open(img2_path)
+    # 파일 경로, PNG bytes, decode된 배열, Screenshot.thumbnail() 배열 모두 비교 가능
+    def compare_images(self, image1, image2, snapshot=None):
+        with metrics.span("diff"):
+            ignore_regions = snapshot.scan.animated_regions if snapshot is not None else ()
 
-        img1_array = np.array(image1)
-        img2_array = np.array(image2)
-        
-        # Status bar 영역 제외 (상단 50픽셀 정도)
-        status_bar_height = 50
-        img1_array = img1_array[status_bar_height:, :, :]
-        img2_array = img2_array[status_bar_height:, :, :]
-        
-        # Calculate the difference and set a threshold
-        diff = np.abs(img1_array - img2_array)
-        diff_percentage = np.sum(diff > 0) / diff.size
-        
-        # 1% 이상의 픽셀이 변경되었을 때 변화가 있다고 판단
-        return diff_percentage > 0.01
+            # 1% 이상의 픽셀이 변경되었을 때 변화가 있다고 판단
+            return self.screen_diff.compare(image1, image2, ignore_regions)
     
-    def go_back_to_initial_screen(self, max_attempts=5, timeout=3):
-        """액션 수행 후 원래 화면으로 돌아가기"""
-        print("원래 화면으로 복귀 중...")
+    def go_back_to_initial_screen(self, max_attempts=5, timeout=3, min_presses=0):
+        """액션 수행 후 원래 화면으로 돌아가기
+
+        min_presses: 화면 비교 전에 최소한 눌러야 하는 back 횟수
+        (작은 dialog / popup은 구조 fingerprint가 거의 같아서 같은 화면으로 판단될 수 있음)
+        """
+        with metrics.span("back_navigation"):
+            return self._go_back_to_initial_screen(max_attempts, timeout, min_presses)
+
+    def _go_back_to_initial_screen(self, max_attempts, timeout, min_presses):
+        logger.debug("원래 화면으로 복귀 중...")
         
         if not self.initial_view_hierarchy:
-            print("⚠️ 초기 화면 정보가 없습니다.")
+            logger.warning("⚠️ 초기 화면 정보가 없습니다.")
             return False
 
+        current_view = ViewSnapshot.from_driver(self.driver)
         for attempt in range(max_attempts):
-            current_view = self.driver.page_source
-            
-            if self.is_same_screen(self.initial_view_hierarchy, current_view):
-                print(f"✅ 원래 화면으로 복귀 완료! (시도: {attempt + 1})")
+            # 구조가 일치하면 바로 중단
+            if attempt >= min_presses and self.is_same_screen(self.initial_view_hierarchy, current_view):
+                logger.debug("✅ 원래 화면으로 복귀 완료! (시도: %d)", attempt + 1)
                 return True
             
             # self.driver.back()
-            driver.press_keycode(4)
-            time.sleep(timeout)
-
-            if attempt == max_attempts - 1:
-                try:
-                    self.driver.activate_app(self.app_name)
-                    time.sleep(timeout)
-                    print("✅ 홈 화면으로 이동 후 앱 재실행 성공!")
-                    return True
-                except Exception as e:
-                    print(f"⚠️ 앱 실행 확인 중 오류 발생: {e}")
-                    return False
-        
-        print("⚠️ 원래 화면으로 돌아가지 못함")
-        return False
+            recoveries = self._recoveries()
+            try:
+                self.driver.press_keycode(4)
+            except SESSION_ERRORS:
+                # 세션이 복구되면 앱이 다시 foreground로 올라옴 -> back은 누른 것으로 보고 현재 화면부터 다시 비교
+                if self._recoveries() == recoveries:
+                    raise
+                logger.info("🔁 back 도중 세션 복구됨")
+            self.element_finder.invalidate()
+            # settle-wait에서 마지막으로 가져온 hierarchy로 다시 비교
+            current_view = self.settle_waiter.wait("back", timeout=timeout).snapshot
+
+        if max_attempts >= min_presses and self.is_same_screen(self.initial_view_hierarchy, current_view):
+            logger.debug("✅ 원래 화면으로 복귀 완료! (시도: %d)", max_attempts + 1)
+            return True
+
+        try:
+            self.driver.activate_app(self.app_name)
+            self.element_finder.invalidate()
+            self.settle_waiter.wait("relaunch", timeout=timeout)
+            # 재실행하면 첫 화면으로 돌아가므로 테스트 중이던 화면으로 다시 이동
+            self.enter_screen()
+            logger.info("✅ 홈 화면으로 이동 후 앱 재실행 성공!")
+            return True
+        except Exception as e:
+            logger.warning("⚠️ 앱 실행 확인 중 오류 발생: %s", e)
+            return False
 
     def is_same_screen(self, view1, view2):
-        """두 개의 View Hierarchy가 같은 화면인지 비교"""
-        return view1 == view2  # 간단 비교 (필요시 개선)
+        """두 개의 View Hierarchy가 같은 화면인지 비교
+
+        text / bounds / focused 등을 뺀 구조 fingerprint로 비교
+        -> 시계, 조회수 변화, 피드 스크롤이 있어도 같은 화면으로 판단
+        """
+        return view1.fingerprint.matches(view2.fingerprint, self.same_screen_threshold)
     
-    def run_test_on_ui_elements(self):
+    # element 속성에 맞는 action 목록
+    def actions_for(self, record) -> list[str]:
+        width, height = record.x2 - record.x1, record.y2 - record.y1
+        actions = []
+        if record.flags & (FLAG_CLICKABLE | FLAG_LONG_CLICKABLE):
+            actions += ["tap", "double_tap", "long_press"]
+        if record.flags & FLAG_SCROLLABLE:
+            # 가로로 긴 element는 좌우, 나머지는 상하로 scroll
+            forward, backward = ("left", "right") if width > height else ("up", "down")
+            actions += [f"swipe_{forward}", f"swipe_{backward}", f"fling_{forward}"]
+        if record.flags & (FLAG_SCALABLE | FLAG_PINCH_CLASS) and min(width, height) >= MIN_MULTI_TOUCH_SIZE:
+            actions += ["pinch_zoom_in", "pinch_zoom_out", "pan"]
+        return [
+            action for action in actions
+            if any(action == gesture or action.startswith(gesture + "_") for gesture in self.gestures)
+        ]
+
+    # action 이름에 맞는 gesture를 element 위에서 수행
+    def perform_action(self, action, record):
+        x, y = record.center_x, record.center_y
+        width, height = record.x2 - record.x1, record.y2 - record.y1
+        if action == "tap":
+            self.action_handler.perform_tap(x, y)
+        elif action == "double_tap":
+            self.action_handler.perform_double_tap(x, y)
+        elif action == "long_press":
+            self.action_handler.perform_long_press(x, y)
+        elif action.startswith("swipe_"):
+            # 끝에서 잠깐 멈춘 뒤 떼서 관성 없이 scroll
+            start_x, start_y, end_x, end_y = swipe_vector(record.bounds, action[len("swipe_"):])
+            self.action_handler.perform_swipe(start_x, start_y, end_x, end_y, velocity=SWIPE_VELOCITY, hold=0.2)
+        elif action.startswith("fling_"):
+            start_x, start_y, end_x, end_y = swipe_vector(record.bounds, action[len("fling_"):])
+            self.action_handler.perform_fling(start_x, start_y, end_x, end_y, velocity=FLING_VELOCITY)
+        elif action in ("pinch_zoom_in", "pinch_zoom_out"):
+            # 두 손가락이 element 밖으로 나가지 않도록 높이에 맞춰 간격 결정
+            self.action_handler.perform_pinch_zoom(
+                x, y, zoom_in=action == "pinch_zoom_in", near=height // 10, far=height * 2 // 5
+            )
+        elif action == "pan":
+            self.action_handler.perform_pan(x, y, 0, -height // 4, fingers=2, spacing=width // 4)
+        else:
+            raise ValueError(f"지원하지 않는 action: {action}")
+
+    # scroll gesture를 반대 방향으로 수행해서 테스트 시작 시점의 element 위치로 복귀
+    # 반대 방향은 fling으로 넘치게 scroll -> 시작 위치가 목록의 끝(보통 맨 위)이면 정확히 돌아옴
+    def undo_scroll(self, action, record):
+        recoveries = self._recoveries()
+        try:
+            if action == "pan":
+                width, height = record.x2 - record.x1, record.y2 - record.y1
+                self.action_handler.perform_pan(
+                    record.center_x, record.center_y, 0, height // 4, fingers=2, spacing=width // 4
+                )
+            else:
+                direction = OPPOSITE_DIRECTIONS[action.split("_", 1)[1]]
+                start_x, start_y, end_x, end_y = swipe_vector(record.bounds, direction)
+                self.action_handler.perform_fling(start_x, start_y, end_x, end_y, velocity=FLING_VELOCITY)
+        except SESSION_ERRORS:
+            # 세션이 복구되었으면 scroll 대신 테스트 중이던 화면으로 다시 이동
+            if self._recoveries() == recoveries:
+                raise
+            return self.resume_screen()
+
+        current_view = self.wait_for_settle("undo_scroll").snapshot
+        change = self.change_classifier.classify(self.initial_view_hierarchy, current_view)
+        return self.is_same_screen(self.initial_view_hierarchy, current_view) and not change.moved
+
+    # SessionDriver가 세션을 다시 연결하거나 앱을 재실행한 횟수 (일반 driver면 항상 0)
+    def _recoveries(self):
+        return getattr(self.driver, "recoveries", 0)
+
+    # 주기적으로 세션 / 앱 상태 확인 (SessionDriver일 때만), 복구되었으면 True
+    def ensure_session_healthy(self):
+        check = getattr(self.driver, "ensure_healthy", None)
+        return bool(check and check())
+
+    # 세션 / 앱 복구 후 테스트 중이던 화면으로 다시 이동 (같은 화면이면 그대로, 아니면 back / 재실행 후 이동)
+    def resume_screen(self):
+        logger.info("🔁 세션 / 앱 복구됨 -> 테스트 중이던 화면으로 다시 이동")
+        self.element_finder.invalidate()
+        self.wait_for_settle("recover")
+        return self.go_back_to_initial_screen()
+
+    # 액션 하나를 수행하고 결과를 저장 / 기록
+    # True: 계속 진행, False: 원래 화면으로 돌아가지 못함, None: 도중에 세션 / 앱이 복구되어 결과를 버림
+    def test_action(self, screen, key, idx, record, action):
+        recoveries = self._recoveries()
+        bounds = record.node.attrib.get("bounds")
+
+        # 액션 수행 전 스크린샷
+        before_screenshot, before_view_hierarchy = self.take_screenshot()
+
+        # 액션 실행
+        try:
+            self.perform_action(action, record)
+        except SESSION_ERRORS:
+            # 세션이 복구되었으면 다른 화면일 수 있으므로 gesture를 다시 보내지 않음 -> 화면으로 이동 후 재시도
+            if self._recoveries() != recoveries:
+                return None
+            raise
+
+        # UI 변화 대기 (고정 sleep 대신 화면이 안정될 때까지)
+        settle = self.wait_for_settle(action)
+
+        # 액션 수행 후 스크린샷
+        after_screenshot, after_view_hierarchy = self.take_screenshot(
+            snapshot=settle.snapshot, screenshot=settle.screenshot
+        )
+
+        # before / after가 서로 다른 세션에서 찍혔으면 비교할 수 없음
+        if self._recoveries() != recoveries:
+            return None
+
+        # 변화 감지 및 데이터 처리 (메모리의 배열로 비교)
+        screen_changed = self.compare_images(
+            before_screenshot.thumbnail(self.screen_diff), after_screenshot.thumbnail(self.screen_diff),
+            snapshot=before_view_hierarchy
+        )
+        view_changed = before_view_hierarchy != after_view_hierarchy
+        # node 단위 hierarchy diff + pixel diff 영역으로 변화 종류 분류
+        change = self.change_classifier.classify(before_view_hierarchy, after_view_hierarchy, screen_changed)
+        outcome = change.label
+
+        # 결과를 그래프에 기록 -> 다음 실행(또는 crash 이후)에는 건너뜀
+        target = self.state_graph.add_screen(self.app_name, after_view_hierarchy.fingerprint)
+
+        def record_edge():
+            self.state_graph.record(screen, key, action, outcome, target)
+
+        # 동영상 재생 / 애니메이션만 바뀐 경우(media_only)와 변화 없음(no_op)은 keep_unchanged일 때만 저장
+        if change.keep or self.keep_unchanged:
+            # edge는 sample 파일이 다 써진 뒤에 기록 (write-behind queue에 있던 sample이 crash로 사라지면 다시 테스트)
+            self.save_sample(
+                action, (before_screenshot, before_view_hierarchy), (after_screenshot, after_view_hierarchy),
+                element_id=idx, bounds=bounds, settle_time=round(settle.waited, 3),
+                extra={"view_changed": view_changed, "screen_changed": screen_changed.changed, "outcome": outcome,
+                       "change": change.to_dict()},
+                on_saved=record_edge
+            )
+        else:
+            record_edge()
+        self.element_scheduler.observe(record, action, change.keep)
+
+        if change.needs_back:
+            logger.info("✅ %s 수행 후 변화 감지됨! (%s)", action, outcome)
+
+            # 새 화면 / dialog는 화면 비교 결과와 관계없이 back을 한 번은 눌러서 닫음
+            if not self.go_back_to_initial_screen(min_presses=1):
+                logger.warning("⚠️ 원래 화면으로 돌아가기 실패")
+                return False
+        elif change.keep:
+            # 같은 화면 안의 변화 (toggle / 탭 선택 / scroll) -> back 없이 계속 테스트
+            logger.info("🔄 %s 수행 후 화면 안에서 변화 감지됨 (%s)", action, outcome)
+
+            # 탭 전환 등으로 다른 화면이 되었으면 남은 후보의 좌표가 맞지 않음 -> 원래 화면으로 복귀
+            if not self.is_same_screen(self.initial_view_hierarchy, after_view_hierarchy):
+                logger.info("↩️ %s 수행 후 다른 화면으로 바뀜 -> 원래 화면으로 복귀", action)
+                if not self.go_back_to_initial_screen():
+                    logger.warning("⚠️ 원래 화면으로 돌아가기 실패")
+                    return False
+            # 같은 화면이지만 scroll로 element가 움직였으면 scroll 위치를 되돌림
+            elif change.moved and action.startswith(SCROLL_GESTURES) and not self.undo_scroll(action, record):
+                logger.warning("⚠️ scroll 위치를 되돌리지 못함")
+                return False
+        else:
+            # 변화가 없으면 keep_unchanged가 아닌 이상 아무것도 저장하지 않음
+            logger.info("❌ %s 수행 후 변화 없음 (%s)", action, outcome)
+        return True
+
+    # partition=(i, n)이 주어지면 element key의 hash를 n으로 나눈 나머지가 i인 element만 테스트
+    # (여러 디바이스에 분배할 때 사용, 디바이스마다 element 순서가 달라도 같은 element는 같은 partition)
+    # budget: 화면당 시간 / 액션 수 제한 (CrawlBudget), navigator: 화면 이동 담당 (ScreenExplorer)
+    def run_test_on_ui_elements(self, partition=None, navigate_steps=None, budget=None, navigator=None):
         # TODO: action을 수행한 이후 다시 원래 화면으로 돌아와야 함
         if not self.ensure_app_running():
-            print("⚠️ 앱 실행 실패")
+            logger.warning("⚠️ 앱 실행 실패")
             return
         
          # 앱 로드 대기
-        time.sleep(5) 
+        self.wait_for_settle("app_load")
 
-        elements = self.element_finder.find_interactive_elements()
-        self.initial_view_hierarchy = self.driver.page_source
+        self.navigate_steps = navigate_steps or []
+        self.navigator = navigator
+        self.enter_screen()
 
-        for idx, element in enumerate(elements):
-            bounds = element.attrib.get("bounds")
-            if not bounds:
-                continue
+        if budget is not None:
+            budget.start()
+
+        # 화면 이동 후의 hierarchy로 element 검색
+        self.initial_view_hierarchy = ViewSnapshot.from_driver(self.driver)
+        self.element_finder.load_snapshot(self.initial_view_hierarchy)
+        # tap / swipe / pinch 대상 element를 document 순서로 합침 (여러 gesture 대상이면 한 번만)
+        records = {}
+        for record in (
+            self.element_finder.find_interactive_records()
+            + self.element_finder.find_swipeable_records()
+            + self.element_finder.find_pinch_zoomable_records()
+        ):
+            records.setdefault(record.index, record)
+        elements = [records[index] for index in sorted(records)]
+        screen = self.state_graph.add_screen(self.app_name, self.initial_view_hierarchy.fingerprint)
+
+        candidates = []
+        for idx, record in enumerate(elements):
+            actions = self.actions_for(record)
+            if actions:
+                candidates.append((element_key(record.node), idx, record, actions))
+        # 중복 target 제거 + 변화 확률 순 정렬 (시간 budget이 있으면 확률이 낮은 action은 건너뜀)
+        # wrapper / child가 서로 다른 partition이어도 중복이 제거되도록 전체 목록에서 제거한 뒤 partition을 나눔
+        time_limited = budget is not None and budget.max_seconds is not None
+        candidates = self.element_scheduler.schedule(candidates, skip_low_yield=time_limited)
+        if partition is not None:
+            candidates = [
+                candidate for candidate in candidates if element_partition(candidate[0], partition[1]) == partition[0]
+            ]
+        # 아직 테스트하지 않은 element부터
+        candidates = self.state_graph.prioritize(screen, candidates)
 
-            match = re.findall(r"\d+", bounds)
-            if len(match) != 4:
+        for key, idx, record, actions in candidates:
+            # bounds / 중심 좌표는 index 생성 시 파싱된 값 사용
+            bounds = record.node.attrib.get("bounds")
+            pending_actions = self.state_graph.unexplored_actions(screen, key, actions)
+            if not pending_actions:
+                logger.debug("⏭️ [%d/%d] 이미 테스트한 element: %s", idx + 1, len(elements), bounds)
                 continue
 
-            x1, y1, x2, y2 = map(int, match)
-            center_x = (x1 + x2) // 2
-            center_y = (y1 + y2) // 2
-
-            print(f"[{idx+1}/{len(elements)}] UI 요소 테스트 중: 위치=({center_x}, {center_y})")
-
-            # TODO: swipe, double_tap, pinch_zoom 추가해야 함
-            actions = ["tap", "long_press"]
-
-            for action in actions:
-                # 액션 수행 전 스크린샷
-                before_screenshot = self.take_screenshot(action, "before", element_id=idx, bounds=bounds)
-                before_view_hierarchy = self.driver.page_source
-
-                # 액션 실행
-                if action == "tap":
-                    self.action_handler.perform_tap(center_x, center_y)
-                elif action == "long_press":
-                    self.action_handler.perform_long_press(center_x, center_y)
-                elif action == "swipe":
-                    # 위로 swipe
-                    self.action_handler.perform_swipe(center_x, center_y, center_x, center_y - 200)
-                
-                 # UI 변화 대기
-                if action == "tap":
-                    time.sleep(10)
-                elif action == "long_press":
-                    time.sleep(0.1)
-
-                # 액션 수행 후 스크린샷
-                after_screenshot = self.take_screenshot(action, "after", element_id=idx, bounds=bounds)
-                after_view_hierarchy = self.driver.page_source
-
-                # 변화 감지 및 데이터 처리
-                screen_changed = self.compare_images(before_screenshot, after_screenshot)
-                view_changed = not self.is_same_screen(before_view_hierarchy, after_view_hierarchy)
-
-                if view_changed:
-                    print(f"✅ {action} 수행 후 변화 감지됨!")
-
-                    if not self.go_back_to_initial_screen():
-                        print("⚠️ 원래 화면으로 돌아가기 실패")
-                        return
-                else:
-                    print(f"❌ {action} 수행 후 변화 없음. 폴더 삭제")
-                    self.clear_data(self.app_name, action)
-
-                time.sleep(5)  # 다음 액션 대기
+            center_x, center_y = record.center_x, record.center_y
+
+            logger.info("[%d/%d] UI 요소 테스트 중: 위치=(%d, %d)", idx + 1, len(elements), center_x, center_y)
+
+            if budget is not None and budget.exhausted:
+                logger.info("⏹️ 화면 budget 소진 (액션 %d회, %.1f초)", budget.actions, budget.elapsed)
+                break
+
+            if self.ensure_session_healthy() and not self.resume_screen():
+                logger.warning("⚠️ 복구 후 테스트 중이던 화면으로 돌아가기 실패")
+                return
+
+            for action in pending_actions:
+                if budget is not None:
+                    if budget.exhausted:
+                        break
+                    budget.consume()
+
+                result = self.test_action(screen, key, idx, record, action)
+                if result is None and self.resume_screen():
+                    # 세션 / 앱이 복구됨 -> 화면으로 다시 이동한 뒤 같은 element의 같은 action부터 재개
+                    result = self.test_action(screen, key, idx, record, action)
+                if not result:
+                    return
+
+        # write-behind로 queue에 남은 샘플 저장 완료
+        self.data_saver.flush()
 
 if __name__ == "__main__":
     # TODO: 여러 개의 앱을 테스트해야 함.
     # TODO: 테스트할 앱의 모든 화면에 대해서 테스트를 진행해야 함. -> 모든 activity에 대해서 테스트를 진행해야 함
-    desired_caps = {
-        "platformName": "Android",
-        "automationName": "UiAutomator2",
-        "deviceName": "emulator-5556",
-        # "appPackage": "com.google.android.youtube",
-        # "appActivity": ".app.honeycomb.Shell$HomeActivity",
-        "appPackage": "com.twitter.android",
-        "appActivity": ".StartActivity",
-        "autoGrantPermissions": True,
-        "noReset": True
+    app = {
+        # "package": "com.google.android.youtube",
+        # "activity": ".app.honeycomb.Shell$HomeActivity",
+        "package": "com.twitter.android",
+        "activity": ".StartActivity",
     }
 
+    # INFO: 액션 결과 / 복구, DEBUG: 파일 저장 / settle 시간 등 (대량 crawl에서는 INFO 이상 권장)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    # phase별 소요 시간 histogram을 1분마다 dataset/metrics.jsonl에 기록하고 요약 출력
+    configure_metrics("dataset/metrics.jsonl", summary_interval=60)
+
+    # 세션이 죽거나 앱이 crash 나도 다시 연결 / 재실행하고 테스트 중이던 element부터 이어서 진행
+    driver = SessionDriver(DeviceEndpoint("emulator-5556"), app)
+    data_saver = DataSaver(write_behind=True)
     try:
-        driver = webdriver.Remote("http://localhost:4723", options=UiAutomator2Options().load_capabilities(desired_caps))
-        tester = UIActionAutomator(driver)
+        tester = UIActionAutomator(driver, data_saver=data_saver)
         tester.run_test_on_ui_elements()
 
     except Exception as e:
-        print(f"⚠️ 테스트 실행 중 오류 발생: {e}")
+        logger.exception("⚠️ 테스트 실행 중 오류 발생: %s", e)
 
     finally:
-        driver.quit()
\ No newline at end of file
+        data_saver.close()
+        metrics.close()
+        driver.quit()
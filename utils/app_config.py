@@ -0,0 +1,19 @@
+import re
+import json
+
+# 손으로 편집하다 생기는 trailing comma 허용
+_TRAILING_COMMA = re.compile(r",(\s*[}\]])")
+
+
+def load_config(path="config.json") -> list[dict]:
+    """config.json을 읽어서 앱 목록을 반환"""
+    with open(path, "r", encoding="utf-8") as f:
+        text = f.read()
+    config = json.loads(_TRAILING_COMMA.sub(r"\1", text))
+    return config.get("apps", [])
+
+
+def iter_screens(app: dict):
+    """(screen 이름, navigate 단계 목록) 순회"""
+    for screen_name, screen in app.get("screens", {}).items():
+        yield screen_name, screen.get("navigate", [])
@@ -0,0 +1,107 @@
+import atexit
+import queue
+import threading
+
+
+class AsyncWriteError(RuntimeError):
+    """background 저장 중 발생한 오류를 crawl thread로 전달"""
+
+
+class _WriteJob:
+    def __init__(self, key, fn, args):
+        self.key = key
+        self.fn = fn
+        self.args = args
+        self.cancelled = False
+
+
+class AsyncWriter:
+    """DataSaver의 write-behind 저장용 worker pool
+
+    crawl thread는 저장 작업을 queue에 넣기만 하고 worker thread가 디스크에 씀
+    -> 디바이스 대기 시간 동안 디스크 I/O가 같이 진행됨.
+    queue가 가득 차면 submit()이 block 되어 backpressure가 걸리고,
+    worker에서 난 오류는 다음 submit() / flush() 때 AsyncWriteError로 올라옴
+    """
+
+    def __init__(self, max_queue=32, workers=2):
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._lock = threading.Lock()
+        self._pending = {}  # key -> 아직 시작되지 않은 job 목록
+        self._errors = []
+        self._closed = False
+        self._threads = [
+            threading.Thread(target=self._worker, name=f"async-writer-{i}", daemon=True)
+            for i in range(workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+        # 프로세스 종료 시 남은 작업 저장
+        atexit.register(self.close)
+
+    def _worker(self):
+        while True:
+            job = self._queue.get()
+            if job is None:
+                self._queue.task_done()
+                return
+
+            with self._lock:
+                jobs = self._pending.get(job.key, [])
+                if job in jobs:
+                    jobs.remove(job)
+                    if not jobs:
+                        del self._pending[job.key]
+                run = not job.cancelled
+
+            try:
+                if run:
+                    job.fn(*job.args)
+            except Exception as e:
+                with self._lock:
+                    self._errors.append(e)
+            finally:
+                self._queue.task_done()
+
+    def _raise_errors(self):
+        with self._lock:
+            if not self._errors:
+                return
+            errors, self._errors = self._errors, []
+        raise AsyncWriteError(f"background 저장 실패 {len(errors)}건: {errors[0]}") from errors[0]
+
+    def submit(self, key, fn, *args):
+        """저장 작업 추가 (queue가 가득 차면 자리가 날 때까지 대기)"""
+        if self._closed:
+            raise AsyncWriteError("이미 종료된 writer입니다.")
+        self._raise_errors()
+
+        job = _WriteJob(key, fn, args)
+        with self._lock:
+            self._pending.setdefault(key, []).append(job)
+        self._queue.put(job)
+        return job
+
+    def cancel(self, key) -> bool:
+        """key의 아직 시작되지 않은 작업을 취소. 취소한 작업이 있으면 True"""
+        with self._lock:
+            jobs = self._pending.pop(key, [])
+            for job in jobs:
+                job.cancelled = True
+            return bool(jobs)
+
+    def flush(self):
+        """queue의 모든 작업이 끝날 때까지 대기하고 오류가 있으면 raise"""
+        self._queue.join()
+        self._raise_errors()
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        for _ in self._threads:
+            self._queue.put(None)
+        for thread in self._threads:
+            thread.join()
+        atexit.unregister(self.close)
+        self._raise_errors()
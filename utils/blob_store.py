@@ -0,0 +1,98 @@
+import os
+import sys
+import hashlib
+import threading
+
+BLOB_DIR = "blobs"
+MANIFEST_FILE = "blobs.json"
+
+
+class BlobStore:
+    """내용(hash) 기준으로 파일을 한 번만 저장하는 content-addressed storage
+
+    같은 화면의 before 스크린샷 / hierarchy처럼 반복되는 데이터는 blob 하나만 저장하고
+    sample은 blob 경로(ref)만 참조함. ref는 dataset 루트 기준 상대 경로
+    """
+
+    def __init__(self, base_dir="dataset"):
+        self.base_dir = base_dir
+        self.root = os.path.join(base_dir, BLOB_DIR)
+        os.makedirs(self.root, exist_ok=True)
+        self._lock = threading.Lock()
+        self._known = set()
+        self.puts = 0
+        self.unique = 0
+        self.bytes_in = 0
+        self.bytes_written = 0
+
+    @staticmethod
+    def digest(data: bytes) -> str:
+        return hashlib.sha1(data).hexdigest()
+
+    def ref_for(self, digest, extension) -> str:
+        return os.path.join(BLOB_DIR, digest[:2], digest[2:] + extension)
+
+    def put(self, data: bytes, extension="") -> str:
+        """blob 저장 (이미 있으면 쓰지 않음) 후 ref 반환"""
+        ref = self.ref_for(self.digest(data), extension)
+        path = os.path.join(self.base_dir, ref)
+
+        with self._lock:
+            self.puts += 1
+            self.bytes_in += len(data)
+            if ref in self._known:
+                return ref
+            self._known.add(ref)
+
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # 임시 파일에 쓰고 rename -> 다른 worker가 반쯤 쓰인 blob을 읽지 않음
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+            with self._lock:
+                self.unique += 1
+                self.bytes_written += len(data)
+        return ref
+
+    def get(self, ref) -> bytes:
+        with open(os.path.join(self.base_dir, ref), "rb") as f:
+            return f.read()
+
+    @property
+    def dedup_ratio(self) -> float:
+        """입력 bytes / 실제로 쓴 bytes (1.0이면 중복 없음)"""
+        return self.bytes_in / self.bytes_written if self.bytes_written else 1.0
+
+    def report(self) -> str:
+        return (f"♻️ dedup: blob {self.puts}개 중 {self.unique}개 저장, "
+                f"{self.bytes_in / 1e6:.2f}MB -> {self.bytes_written / 1e6:.2f}MB (x{self.dedup_ratio:.2f})")
+
+
+def analyze_dataset(base_dir="dataset"):
+    """기존 dataset의 중복 정도 측정 (파일은 쓰지 않음)"""
+    seen = set()
+    total_bytes = unique_bytes = total_files = 0
+    for dirpath, dirnames, filenames in os.walk(base_dir):
+        dirnames[:] = [d for d in dirnames if d != BLOB_DIR]
+        for filename in filenames:
+            if filename.startswith("."):
+                continue
+            with open(os.path.join(dirpath, filename), "rb") as f:
+                data = f.read()
+            total_files += 1
+            total_bytes += len(data)
+            digest = BlobStore.digest(data)
+            if digest not in seen:
+                seen.add(digest)
+                unique_bytes += len(data)
+
+    ratio = total_bytes / unique_bytes if unique_bytes else 1.0
+    print(f"파일 {total_files}개 중 고유 {len(seen)}개, "
+          f"{total_bytes / 1e6:.2f}MB -> {unique_bytes / 1e6:.2f}MB (x{ratio:.2f})")
+    return ratio
+
+
+if __name__ == "__main__":
+    analyze_dataset(*sys.argv[1:2])
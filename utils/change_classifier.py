@@ -0,0 +1,199 @@
+import hashlib
+from utils.compact_hierarchy import (
+    PARENT, FLAGS, X1, Y1, X2, Y2, STRING_COLUMNS, BOOLEAN_BITS,
+)
+from utils.element_index import ANIMATED_VIEW_CLASSES
+from utils.state_graph import (
+    OUTCOME_NO_OP, OUTCOME_NEW_SCREEN, OUTCOME_DIALOG, OUTCOME_TOGGLE, OUTCOME_MEDIA, DIALOG_CONTAINMENT,
+    MEANINGFUL_OUTCOMES,
+)
+
+# 같은 node에서 값이 바뀌면 in-place 상태 변화로 보는 attribute
+# (focused는 tap만으로도 바뀌므로 제외)
+STATE_BITS = BOOLEAN_BITS["checked"] | BOOLEAN_BITS["selected"] | BOOLEAN_BITS["enabled"]
+STATE_STRINGS = (STRING_COLUMNS["text"], STRING_COLUMNS["content-desc"])
+
+# 복귀(back)가 필요한 변화: 다른 화면으로 이동했거나 위에 dialog / overlay가 뜬 경우
+BACK_OUTCOMES = {OUTCOME_NEW_SCREEN, OUTCOME_DIALOG}
+
+_CLASS = STRING_COLUMNS["class"]
+_RESOURCE_ID = STRING_COLUMNS["resource-id"]
+_SCROLLABLE = BOOLEAN_BITS["scrollable"]
+
+
+def _identities(compact) -> list[bytes]:
+    """node identity: 부모 identity + class + resource-id + 같은 key를 가진 형제 중 순서
+
+    text / bounds 등 내용이 바뀌어도 같은 node로 매칭되고, 반복 item은 순서로 구분
+    """
+    strings = compact.strings
+    identities = []
+    occurrences = {}
+    for row in compact.nodes:
+        parent = identities[row[PARENT]] if row[PARENT] >= 0 else b""
+        key = (parent, row[_CLASS], row[_RESOURCE_ID])
+        ordinal = occurrences.get(key, 0)
+        occurrences[key] = ordinal + 1
+        name = f"{strings[row[_CLASS]]}|{strings[row[_RESOURCE_ID]]}|{ordinal}"
+        identities.append(hashlib.blake2b(parent + name.encode("utf-8"), digest_size=8).digest())
+    return identities
+
+
+def _bounds(row):
+    return None if row[X1] is None else (row[X1], row[Y1], row[X2], row[Y2])
+
+
+def _intersects(bounds, bbox) -> bool:
+    if bounds is None or bbox is None:
+        return False
+    return bounds[0] < bbox[2] and bbox[0] < bounds[2] and bounds[1] < bbox[3] and bbox[1] < bounds[3]
+
+
+def _has_flagged_ancestor(compact, i, bit) -> bool:
+    parent = compact.nodes[i][PARENT]
+    while parent >= 0:
+        if compact.nodes[parent][FLAGS] & bit:
+            return True
+        parent = compact.nodes[parent][PARENT]
+    return False
+
+
+class ChangeResult:
+    """액션 하나의 변화 분류 결과"""
+
+    __slots__ = ("label", "retained", "added", "removed", "state_changes", "moved", "media_changes", "pixel_diff")
+
+    def __init__(self, label, retained=1.0, added=(), removed=(), state_changes=(), moved=(), media_changes=(),
+                 pixel_diff=None):
+        self.label = label
+        self.retained = retained            # before node 중 after에도 남아 있는 비율
+        self.added = added                  # after에만 있는 subtree의 root (after node 번호)
+        self.removed = removed              # before에만 있는 subtree의 root (before node 번호)
+        self.state_changes = state_changes  # 상태 / text가 바뀐 node (after node 번호)
+        self.moved = moved                  # bounds만 바뀐 node (after node 번호)
+        self.media_changes = media_changes  # 애니메이션 class node의 변화 (after node 번호)
+        self.pixel_diff = pixel_diff        # ScreenDiff.compare 결과 (없으면 None)
+
+    # 학습 sample로 남길 변화인지 (media / no-op은 액션과 상관없이 생기는 변화)
+    @property
+    def keep(self) -> bool:
+        return self.label in MEANINGFUL_OUTCOMES
+
+    # 원래 화면으로 돌아가야 하는지 (in-place 변화는 같은 화면에서 계속 테스트)
+    @property
+    def needs_back(self) -> bool:
+        return self.label in BACK_OUTCOMES
+
+    def to_dict(self) -> dict:
+        return {
+            "label": self.label,
+            "retained": round(self.retained, 3),
+            "added": len(self.added),
+            "removed": len(self.removed),
+            "state_changes": len(self.state_changes),
+            "moved": len(self.moved),
+            "media_changes": len(self.media_changes),
+            "pixel_score": round(self.pixel_diff.score, 4) if self.pixel_diff is not None else None,
+        }
+
+    def __repr__(self):
+        return f"ChangeResult({self.label!r}, retained={self.retained:.2f}, added={len(self.added)}, " \
+               f"state={len(self.state_changes)}, moved={len(self.moved)})"
+
+
+class ChangeClassifier:
+    """before / after hierarchy의 node identity diff와 pixel diff를 합쳐서 변화 종류를 분류
+
+    - new_screen: before node가 dialog_containment 미만으로 남음 (다른 화면으로 이동)
+    - dialog: before 대부분이 남고, scroll container 밖에 새 subtree가 추가됨 (dialog / overlay / menu)
+    - toggle: 구조는 그대로이고 node 상태(checked / selected / text 등)나 위치(scroll)가 바뀜.
+      pixel diff가 있으면 바뀐 영역(bbox)과 겹치는 node의 변화만 인정
+    - media_only: hierarchy 변화가 애니메이션 class node에만 있거나 없는데 pixel이 threshold 이상 바뀜
+    - no_op: 보이는 변화 없음
+    """
+
+    def __init__(self, dialog_containment=DIALOG_CONTAINMENT):
+        self.dialog_containment = dialog_containment
+
+    def classify(self, before, after, pixel_diff=None) -> ChangeResult:
+        """before / after: ViewSnapshot, pixel_diff: ScreenDiff.compare 결과 (DiffResult)"""
+        pixel_changed = pixel_diff is not None and pixel_diff.changed
+        if before.xml_source == after.xml_source:
+            return ChangeResult(OUTCOME_MEDIA if pixel_changed else OUTCOME_NO_OP, pixel_diff=pixel_diff)
+
+        old, new = before.compact, after.compact
+        old_ids, new_ids = _identities(old), _identities(new)
+        old_index = {identity: i for i, identity in enumerate(old_ids)}
+        new_set = set(new_ids)
+
+        added = [
+            i for i, identity in enumerate(new_ids)
+            if identity not in old_index and (new.nodes[i][PARENT] < 0 or new_ids[new.nodes[i][PARENT]] in old_index)
+        ]
+        removed = [
+            i for i, identity in enumerate(old_ids)
+            if identity not in new_set and (old.nodes[i][PARENT] < 0 or old_ids[old.nodes[i][PARENT]] in new_set)
+        ]
+        retained = sum(1 for identity in old_ids if identity in new_set) / len(old_ids) if old_ids else 1.0
+
+        state_changes, moved, media_changes = [], [], []
+        for i, identity in enumerate(new_ids):
+            j = old_index.get(identity)
+            if j is None:
+                continue
+            new_row, old_row = new.nodes[i], old.nodes[j]
+            if new.strings[new_row[_CLASS]] in ANIMATED_VIEW_CLASSES:
+                # string id는 hierarchy마다 다르므로 attribute 값으로 비교
+                if new.attributes(i) != old.attributes(j):
+                    media_changes.append(i)
+                continue
+            if (new_row[FLAGS] ^ old_row[FLAGS]) & STATE_BITS or any(
+                new.strings[new_row[column]] != old.strings[old_row[column]] for column in STATE_STRINGS
+            ):
+                state_changes.append(i)
+            elif _bounds(new_row) != _bounds(old_row):
+                moved.append(i)
+
+        # pixel diff가 있으면 실제로 보이는 영역이 바뀐 node만 남김 (화면 밖 / 가려진 node의 변화 무시)
+        # bbox는 threshold와 상관없이 사용 -> checkbox 등 전체의 1% 미만인 작은 변화도 인정
+        pixel_visible = pixel_diff is None or pixel_diff.bbox is not None
+        if pixel_diff is not None:
+            bbox = pixel_diff.bbox
+            state_changes = [i for i in state_changes if _intersects(_bounds(new.nodes[i]), bbox)]
+            moved = [i for i in moved if _intersects(_bounds(new.nodes[i]), bbox)]
+
+        # scroll container 안에 추가된 item(피드 로딩 등)은 overlay가 아님
+        overlays = [i for i in added if not _has_flagged_ancestor(new, i, _SCROLLABLE)]
+        in_place_structure = [i for i in added if i not in overlays] + removed
+
+        if retained < self.dialog_containment:
+            label = OUTCOME_NEW_SCREEN
+        elif overlays:
+            label = OUTCOME_DIALOG
+        elif state_changes or moved or (in_place_structure and pixel_visible):
+            label = OUTCOME_TOGGLE
+        elif pixel_changed or media_changes:
+            label = OUTCOME_MEDIA
+        else:
+            label = OUTCOME_NO_OP
+        return ChangeResult(label, retained, added, removed, state_changes, moved, media_changes, pixel_diff)
+
+
+# 사용 예시: dataset의 before / after 쌍 분류 결과 출력
+if __name__ == "__main__":
+    from utils.dataset_reader import DatasetReader
+    from utils.screen_diff import ScreenDiff
+    from utils.view_snapshot import ViewSnapshot
+
+    classifier = ChangeClassifier()
+    screen_diff = ScreenDiff()
+    reader = DatasetReader("dataset")
+    counts = {}
+    for sample in reader.iter_samples():
+        before, after = ViewSnapshot(sample.before_xml), ViewSnapshot(sample.after_xml)
+        pixel_diff = screen_diff.compare(sample.before_image, sample.after_image, before.scan.animated_regions)
+        result = classifier.classify(before, after, pixel_diff)
+        counts[result.label] = counts.get(result.label, 0) + 1
+        print(f"{sample}: {result} back={result.needs_back}")
+    reader.close()
+    print(counts)
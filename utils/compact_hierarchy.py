@@ -0,0 +1,234 @@
+import json
+from utils.element_index import parse_bounds
+
+COMPACT_FORMAT = "compact-hierarchy"
+COMPACT_VERSION = 1
+
+# "true" / "false" attribute -> flags의 bit (순서 = bit 번호)
+BOOLEAN_ATTRIBUTES = (
+    "checkable", "checked", "clickable", "enabled", "focusable", "focused",
+    "long-clickable", "password", "scrollable", "selected", "displayed",
+)
+BOOLEAN_BITS = {name: 1 << i for i, name in enumerate(BOOLEAN_ATTRIBUTES)}
+
+# 반복이 많은 문자열 attribute -> strings table의 id로 저장
+STRING_ATTRIBUTES = ("class", "package", "resource-id", "text", "content-desc")
+
+# node row: [parent, flags, missing, x1, y1, x2, y2, class, package, resource-id, text, content-desc, (extra)]
+# - parent: 부모 node 번호 (root는 -1, 예전 형식에서 변환한 node는 부모를 알 수 없으므로 -1)
+# - flags: 값이 "true"인 BOOLEAN_ATTRIBUTES bit, missing: attribute 자체가 없는 bit
+# - bounds가 없으면 (hierarchy root 등) x1..y2는 null
+# - string id 0은 attribute 없음 (strings[0] = null)
+# - extra: 나머지 attribute의 [key id, value id, ...] (없으면 row에서 생략)
+#   index attribute는 형제 중 순서와 같으면 저장하지 않음 (to_elements에서 복원)
+PARENT, FLAGS, MISSING, X1, Y1, X2, Y2 = range(7)
+STRING_COLUMNS = {name: 7 + i for i, name in enumerate(STRING_ATTRIBUTES)}
+EXTRA = 7 + len(STRING_ATTRIBUTES)
+
+_KNOWN_ATTRIBUTES = set(BOOLEAN_ATTRIBUTES) | set(STRING_ATTRIBUTES) | {"bounds", "index"}
+
+
+class CompactHierarchyBuilder:
+    """document 순서로 node를 하나씩 추가해서 CompactHierarchy를 만듦 (tree 전체가 메모리에 없어도 됨)"""
+
+    def __init__(self):
+        self.strings = [None]
+        self._string_ids = {None: 0}
+        self.nodes = []
+        self._child_counts = {}  # parent -> 지금까지 추가된 자식 수
+
+    def intern(self, value) -> int:
+        string_id = self._string_ids.get(value)
+        if string_id is None:
+            string_id = self._string_ids[value] = len(self.strings)
+            self.strings.append(value)
+        return string_id
+
+    def add(self, parent, attrib) -> int:
+        """attribute dict를 가진 node 추가 후 node 번호 반환"""
+        flags = missing = 0
+        extra = []
+        for name, bit in BOOLEAN_BITS.items():
+            value = attrib.get(name)
+            if value == "true":
+                flags |= bit
+            elif value is None:
+                missing |= bit
+            elif value != "false":
+                missing |= bit
+                extra += [self.intern(name), self.intern(value)]
+
+        bounds = attrib.get("bounds")
+        # 형식이 다르면 (None) 원래 문자열을 extra에 보관
+        coords = parse_bounds(bounds) if bounds is not None else None
+        if coords is None:
+            coords = [None, None, None, None]
+            if bounds is not None:
+                extra += [self.intern("bounds"), self.intern(bounds)]
+
+        position = self._child_counts.get(parent, 0)
+        self._child_counts[parent] = position + 1
+        index = attrib.get("index")
+        if index != str(position):
+            # 순서와 다르거나 index attribute가 없으면 (None -> string id 0) 그대로 보관
+            extra += [self.intern("index"), self.intern(index)]
+
+        row = [parent, flags, missing, *coords]
+        row += [self.intern(attrib.get(name)) for name in STRING_ATTRIBUTES]
+        for name, value in attrib.items():
+            if name not in _KNOWN_ATTRIBUTES:
+                extra += [self.intern(name), self.intern(value)]
+        if extra:
+            row.append(extra)
+
+        self.nodes.append(row)
+        return len(self.nodes) - 1
+
+    def build(self) -> "CompactHierarchy":
+        return CompactHierarchy(self.strings, self.nodes)
+
+
+class CompactHierarchy:
+    """simplified view hierarchy의 압축 형식
+
+    boolean attribute는 bitfield, bounds는 정수, tree 구조는 parent 번호로 보존하고
+    class / package 등 반복되는 문자열은 strings table에 한 번만 저장.
+    들여쓰기 없는 JSON 한 줄로 저장 -> 예전 attribute dict 목록보다 작고 쓰기 / 읽기가 빠름
+    """
+
+    __slots__ = ("strings", "nodes")
+
+    def __init__(self, strings, nodes):
+        self.strings = strings
+        self.nodes = nodes
+
+    @classmethod
+    def from_root(cls, root) -> "CompactHierarchy":
+        """파싱된 ElementTree를 document 순서로 변환"""
+        builder = CompactHierarchyBuilder()
+        stack = [(root, -1)]
+        while stack:
+            node, parent = stack.pop()
+            index = builder.add(parent, node.attrib)
+            stack.extend((child, index) for child in reversed(node))
+        return builder.build()
+
+    @classmethod
+    def from_elements(cls, elements) -> "CompactHierarchy":
+        """예전 형식(attribute dict 목록)에서 변환, 부모 정보는 없으므로 parent = -1"""
+        builder = CompactHierarchyBuilder()
+        for attrib in elements:
+            builder.add(-1, attrib)
+        return builder.build()
+
+    @classmethod
+    def from_json(cls, data) -> "CompactHierarchy":
+        if data.get("format") != COMPACT_FORMAT or data.get("version") != COMPACT_VERSION:
+            raise ValueError(f"지원하지 않는 simplified hierarchy 형식: {data.get('format')} v{data.get('version')}")
+        return cls(data["strings"], data["nodes"])
+
+    def to_json(self) -> dict:
+        return {"format": COMPACT_FORMAT, "version": COMPACT_VERSION, "strings": self.strings, "nodes": self.nodes}
+
+    def dumps(self) -> str:
+        return json.dumps(self.to_json(), ensure_ascii=False, separators=(",", ":"))
+
+    def __len__(self):
+        return len(self.nodes)
+
+    def parent(self, i) -> int:
+        return self.nodes[i][PARENT]
+
+    def children(self, i) -> list[int]:
+        return [j for j in range(i + 1, len(self.nodes)) if self.nodes[j][PARENT] == i]
+
+    def flag(self, i, name) -> bool:
+        return bool(self.nodes[i][FLAGS] & BOOLEAN_BITS[name])
+
+    def bounds(self, i):
+        row = self.nodes[i]
+        return None if row[X1] is None else (row[X1], row[Y1], row[X2], row[Y2])
+
+    def string(self, i, name):
+        return self.strings[self.nodes[i][STRING_COLUMNS[name]]]
+
+    def attributes(self, i) -> dict:
+        """node 하나를 원래의 attribute dict(문자열 값)로 복원"""
+        row = self.nodes[i]
+        attrib = {}
+        for name in STRING_ATTRIBUTES:
+            value = self.strings[row[STRING_COLUMNS[name]]]
+            if value is not None:
+                attrib[name] = value
+        for name, bit in BOOLEAN_BITS.items():
+            if not row[MISSING] & bit:
+                attrib[name] = "true" if row[FLAGS] & bit else "false"
+        if row[X1] is not None:
+            attrib["bounds"] = f"[{row[X1]},{row[Y1]}][{row[X2]},{row[Y2]}]"
+        extra = row[EXTRA] if len(row) > EXTRA else ()
+        for key, value in zip(extra[::2], extra[1::2]):
+            attrib[self.strings[key]] = self.strings[value]
+        return attrib
+
+    def to_elements(self) -> list[dict]:
+        """예전 simplified 형식(attribute dict 목록)으로 변환, index는 형제 순서로 복원"""
+        positions = {}
+        elements = []
+        for i, row in enumerate(self.nodes):
+            position = positions.get(row[PARENT], 0)
+            positions[row[PARENT]] = position + 1
+            attrib = {"index": str(position), **self.attributes(i)}
+            if attrib["index"] is None:
+                del attrib["index"]
+            elements.append(attrib)
+        return elements
+
+
+def load_compact(data) -> CompactHierarchy:
+    """bytes / str / 파싱된 JSON -> CompactHierarchy (예전 형식이면 변환)"""
+    if isinstance(data, (bytes, bytearray, str)):
+        data = json.loads(data)
+    if isinstance(data, dict):
+        return CompactHierarchy.from_json(data)
+    return CompactHierarchy.from_elements(_legacy_elements(data))
+
+
+def load_simplified(data) -> list[dict]:
+    """어떤 형식으로 저장된 simplified hierarchy든 attribute dict 목록으로 반환"""
+    if isinstance(data, (bytes, bytearray, str)):
+        data = json.loads(data)
+    if isinstance(data, dict):
+        return CompactHierarchy.from_json(data).to_elements()
+    return _legacy_elements(data)
+
+
+# 예전 형식: [{attribute...}] 또는 더 예전의 [{"tag", "text", "attributes"}]
+def _legacy_elements(data) -> list[dict]:
+    return [node["attributes"] if "attributes" in node and "tag" in node else node for node in data]
+
+
+# 사용 예시: dataset의 XML을 예전 / compact 형식으로 저장했을 때의 크기와 시간 비교
+if __name__ == "__main__":
+    import glob
+    import time
+    from xml.etree import ElementTree
+
+    paths = sorted(glob.glob("dataset/**/*.xml", recursive=True))
+    roots = [ElementTree.fromstring(open(path, encoding="utf-8").read()) for path in paths]
+
+    def measure(label, encode, decode, repeat=20):
+        started = time.perf_counter()
+        for _ in range(repeat):
+            encoded = [encode(root) for root in roots]
+        write = (time.perf_counter() - started) / repeat
+        started = time.perf_counter()
+        for _ in range(repeat):
+            for text in encoded:
+                decode(text)
+        read = (time.perf_counter() - started) / repeat
+        size = sum(len(text.encode("utf-8")) for text in encoded)
+        print(f"{label:8s} {size / 1024:8.1f}KB  encode {write * 1000:7.1f}ms  load {read * 1000:7.1f}ms  ({len(roots)}개)")
+
+    measure("legacy", lambda root: json.dumps([dict(node.attrib) for node in root.iter()], indent=4), json.loads)
+    measure("compact", lambda root: CompactHierarchy.from_root(root).dumps(), load_compact)
+    measure("compact*", lambda root: CompactHierarchy.from_root(root).dumps(), load_simplified)
@@ -0,0 +1,153 @@
+import os
+import sys
+import time
+import shutil
+import tempfile
+from ui_action_automator import UIActionAutomator
+from utils.data_saver import DataSaver
+from utils.dataset_reader import DatasetReader
+from utils.crawl_metrics import metrics
+from utils.fake_device import FakeDevice, TransitionTable
+from utils.screen_explorer import CrawlBudget
+from utils.settle_waiter import SettleWaiter
+from utils.state_graph import StateGraph
+
+# (phase 이름, 측정할 UIActionAutomator method)
+PHASES = (
+    ("capture", "take_screenshot"),
+    ("gesture", "perform_action"),
+    ("settle", "wait_for_settle"),
+    ("compare", "compare_images"),
+    ("save", "save_sample"),
+    ("go_back", "go_back_to_initial_screen"),
+)
+
+# DataSaver 설정별 시나리오
+SCENARIOS = {
+    "sync": {},
+    "write_behind": {"write_behind": True},
+    "dedup": {"write_behind": True, "dedup": True},
+    "shards": {"use_shards": True},
+}
+
+
+class PhaseTimer:
+    """automator method를 감싸서 phase별 host 시간 / 가상 디바이스 시간을 누적
+
+    phase 안에서 다른 phase가 호출되면(go_back 안의 settle 등) 안쪽 phase에만 시간을 더함
+    """
+
+    def __init__(self, clock):
+        self.clock = clock
+        self.host = {}
+        self.device = {}
+        self.calls = {}
+        self._stack = []  # [phase, host 시작, device 시작, 자식 host, 자식 device]
+
+    def wrap(self, target, phase, method_name):
+        method = getattr(target, method_name)
+
+        def timed(*args, **kwargs):
+            frame = [phase, time.perf_counter(), self.clock(), 0.0, 0.0]
+            self._stack.append(frame)
+            try:
+                return method(*args, **kwargs)
+            finally:
+                self._stack.pop()
+                host = time.perf_counter() - frame[1]
+                device = self.clock() - frame[2]
+                self.add(phase, host - frame[3], device - frame[4])
+                if self._stack:
+                    self._stack[-1][3] += host
+                    self._stack[-1][4] += device
+
+        setattr(target, method_name, timed)
+
+    def add(self, phase, host, device):
+        self.host[phase] = self.host.get(phase, 0.0) + host
+        self.device[phase] = self.device.get(phase, 0.0) + device
+        self.calls[phase] = self.calls.get(phase, 0) + 1
+
+
+def _directory_bytes(path) -> int:
+    total = 0
+    for root, _, files in os.walk(path):
+        total += sum(os.path.getsize(os.path.join(root, name)) for name in files)
+    return total
+
+
+def run_scenario(table, saver_options, max_actions=40, seed=0, latencies=None) -> dict:
+    """fake device로 한 화면을 max_actions만큼 crawl 하고 측정값 반환"""
+    out_dir = tempfile.mkdtemp(prefix="crawl-bench-")
+    try:
+        device = FakeDevice(table, latencies=latencies, seed=seed)
+        settle_waiter = SettleWaiter(device, clock=device.clock, sleep=device.clock.sleep)
+        data_saver = DataSaver(out_dir, **saver_options)
+        automator = UIActionAutomator(
+            device, settle_waiter=settle_waiter, data_saver=data_saver,
+            state_graph=StateGraph(os.path.join(out_dir, "state_graph.jsonl")),
+        )
+        timer = PhaseTimer(device.clock)
+        for phase, method_name in PHASES:
+            timer.wrap(automator, phase, method_name)
+
+        budget = CrawlBudget(max_actions=max_actions, clock=device.clock)
+        metrics.reset()
+        started = time.perf_counter()
+        automator.run_test_on_ui_elements(budget=budget)
+        flush_started, flush_device = time.perf_counter(), device.clock()
+        data_saver.close()
+        timer.add("flush", time.perf_counter() - flush_started, device.clock() - flush_device)
+        host = time.perf_counter() - started
+
+        reader = DatasetReader(out_dir)
+        samples = sum(1 for _ in reader.iter_samples())
+        reader.close()
+        written = _directory_bytes(out_dir) - os.path.getsize(automator.state_graph.path)
+
+        # 디바이스 대기(가상 시간)와 host 계산은 순서대로 일어나므로 합이 실제 소요 시간
+        elapsed = device.clock() + host
+        return {
+            "actions": budget.actions,
+            "samples": samples,
+            "device_seconds": device.clock(),
+            "host_seconds": host,
+            "actions_per_hour": budget.actions / elapsed * 3600 if elapsed else 0.0,
+            "bytes_per_sample": written / samples if samples else 0.0,
+            "phases": {
+                phase: (timer.calls[phase], timer.host[phase], timer.device[phase]) for phase in timer.calls
+            },
+            "requests": dict(device.requests),
+            # 세부 span (hierarchy_fetch / parse / serialize 등)의 host 시간
+            "metrics": metrics.snapshot(),
+        }
+    finally:
+        shutil.rmtree(out_dir, ignore_errors=True)
+
+
+def benchmark(base_dir="dataset", app=None, max_actions=40, scenarios=None, seed=0):
+    table = TransitionTable.from_dataset(base_dir, app)
+    print(f"📱 {table.app}: 화면 {len(table.screens)}개, 전환 {sum(map(len, table.transitions.values()))}개")
+
+    results = {}
+    for name in scenarios or SCENARIOS:
+        result = run_scenario(table, SCENARIOS[name], max_actions=max_actions, seed=seed)
+        results[name] = result
+        print(f"\n=== {name} ===")
+        print(f"액션 {result['actions']}회, sample {result['samples']}개, "
+              f"{result['actions_per_hour']:.0f} actions/hour, sample 당 {result['bytes_per_sample'] / 1024:.1f}KB")
+        print(f"디바이스 대기 {result['device_seconds']:.1f}초 + host 계산 {result['host_seconds']:.2f}초")
+        for phase, (calls, host, device) in sorted(result["phases"].items(), key=lambda item: -sum(item[1][1:])):
+            print(f"  {phase:8s} {calls:4d}회  host {host * 1000:8.1f}ms  device {device:6.1f}s")
+        print(f"  요청: {result['requests']}")
+        print(metrics.summary(result["metrics"]))
+    return results
+
+
+# 사용 예시: python -m utils.crawl_benchmark [dataset] [app] [max_actions]
+if __name__ == "__main__":
+    benchmark(
+        sys.argv[1] if len(sys.argv) > 1 else "dataset",
+        sys.argv[2] if len(sys.argv) > 2 else None,
+        int(sys.argv[3]) if len(sys.argv) > 3 else 40,
+    )
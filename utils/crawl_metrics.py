@@ -0,0 +1,162 @@
+import json
+import time
+import bisect
+import logging
+import threading
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+# histogram bucket 상한 (ms): 0.1ms부터 2배씩, 마지막 bucket(약 52초 초과)은 overflow
+BUCKET_BOUNDS_MS = tuple(0.1 * 2 ** i for i in range(20))
+
+
+class Histogram:
+    """log-scale bucket으로 시간 분포를 누적 (값을 모두 보관하지 않으므로 긴 crawl에서도 메모리 일정)"""
+
+    def __init__(self):
+        self.buckets = [0] * (len(BUCKET_BOUNDS_MS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+
+    def add(self, ms):
+        self.buckets[bisect.bisect_left(BUCKET_BOUNDS_MS, ms)] += 1
+        self.count += 1
+        self.total += ms
+        self.min = ms if self.min is None else min(self.min, ms)
+        self.max = ms if self.max is None else max(self.max, ms)
+
+    # 해당 bucket의 상한으로 근사 (실제 최댓값보다 크지는 않게)
+    def percentile(self, fraction) -> float:
+        if not self.count:
+            return 0.0
+        rank = fraction * self.count
+        seen = 0
+        for i, n in enumerate(self.buckets):
+            seen += n
+            if seen >= rank and n:
+                bound = BUCKET_BOUNDS_MS[i] if i < len(BUCKET_BOUNDS_MS) else self.max
+                return min(bound, self.max)
+        return self.max
+
+    def to_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "total_ms": round(self.total, 3),
+            "mean_ms": round(self.total / self.count, 3) if self.count else 0.0,
+            "min_ms": round(self.min or 0.0, 3),
+            "max_ms": round(self.max or 0.0, 3),
+            "p50_ms": round(self.percentile(0.5), 3),
+            "p90_ms": round(self.percentile(0.9), 3),
+            "p99_ms": round(self.percentile(0.99), 3),
+            # 비어 있지 않은 bucket만: 상한(ms) -> 개수 ("inf" = overflow)
+            "buckets": {
+                (f"{BUCKET_BOUNDS_MS[i]:g}" if i < len(BUCKET_BOUNDS_MS) else "inf"): n
+                for i, n in enumerate(self.buckets) if n
+            },
+        }
+
+
+class CrawlMetrics:
+    """crawl 단계(phase)별 소요 시간 측정
+
+    span(name)으로 감싼 구간의 host 시간을 phase별 Histogram에 누적.
+    span은 중첩될 수 있고 각 phase는 안쪽 span을 포함한 시간 (settle 안의 hierarchy_fetch 등).
+    path가 있으면 summary_interval마다, 그리고 close() 때 전체 snapshot을 JSON-lines로 append하고
+    logger에 phase별 요약을 남김. background writer thread에서 호출해도 안전
+    """
+
+    def __init__(self, path=None, summary_interval=60.0, clock=time.perf_counter):
+        self.path = path
+        self.summary_interval = summary_interval
+        self.clock = clock
+        self.histograms = {}  # phase -> Histogram
+        self._lock = threading.Lock()
+        self._started = clock()
+        self._last_report = self._started
+
+    def configure(self, path=None, summary_interval=None):
+        with self._lock:
+            self.path = path
+            if summary_interval is not None:
+                self.summary_interval = summary_interval
+
+    def record(self, name, seconds):
+        with self._lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram()
+            histogram.add(seconds * 1000)
+            due = self.summary_interval is not None and self.clock() - self._last_report >= self.summary_interval
+            if due:
+                self._last_report = self.clock()
+        if due:
+            self.report()
+
+    @contextmanager
+    def span(self, name):
+        started = self.clock()
+        try:
+            yield
+        finally:
+            self.record(name, self.clock() - started)
+
+    def snapshot(self, final=False) -> dict:
+        with self._lock:
+            return {
+                "time": time.time(),
+                "elapsed": round(self.clock() - self._started, 3),
+                "final": final,
+                "phases": {name: histogram.to_dict() for name, histogram in self.histograms.items()},
+            }
+
+    def summary(self, snapshot=None) -> str:
+        snapshot = snapshot or self.snapshot()
+        lines = [f"📊 crawl metrics ({snapshot['elapsed']:.0f}초)"]
+        phases = sorted(snapshot["phases"].items(), key=lambda item: -item[1]["total_ms"])
+        for name, phase in phases:
+            lines.append(
+                f"  {name:16s} {phase['count']:6d}회  합계 {phase['total_ms'] / 1000:8.2f}초  "
+                f"평균 {phase['mean_ms']:8.1f}ms  p90 {phase['p90_ms']:8.1f}ms  최대 {phase['max_ms']:8.1f}ms"
+            )
+        return "\n".join(lines)
+
+    def report(self, final=False):
+        """지금까지의 snapshot을 metrics 파일에 한 줄 추가하고 요약을 로그로 남김"""
+        snapshot = self.snapshot(final)
+        if self.path is not None:
+            with self._lock, open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(snapshot, ensure_ascii=False) + "\n")
+        if snapshot["phases"]:
+            logger.info(self.summary(snapshot))
+        return snapshot
+
+    def reset(self):
+        with self._lock:
+            self.histograms = {}
+            self._started = self._last_report = self.clock()
+
+    def close(self):
+        self.report(final=True)
+
+
+# 프로세스 전체에서 공유하는 기본 인스턴스 (ViewSnapshot / DataSaver 등이 여기에 기록)
+metrics = CrawlMetrics()
+
+
+def configure(path=None, summary_interval=60.0):
+    """기본 인스턴스의 JSON-lines 출력 경로 / 요약 주기 설정"""
+    metrics.configure(path, summary_interval)
+    return metrics
+
+
+# 사용 예시: 기록된 metrics 파일의 마지막 snapshot 요약 출력
+if __name__ == "__main__":
+    import sys
+
+    path = sys.argv[1] if len(sys.argv) > 1 else "dataset/metrics.jsonl"
+    with open(path, encoding="utf-8") as f:
+        last = json.loads(f.readlines()[-1])
+    print(CrawlMetrics().summary(last))
@@ -0,0 +1,168 @@
+import os
+import queue
+import logging
+import threading
+from ui_action_automator import UIActionAutomator
+from utils.app_config import load_config, iter_screens
+from utils.data_saver import DataSaver
+from utils.state_graph import StateGraph
+from utils.element_scheduler import ElementScheduler, ChangeYieldModel
+from utils.session_pool import DeviceEndpoint, SessionPool, create_driver
+
+logger = logging.getLogger(__name__)
+
+
+class CrawlTask:
+    """한 worker가 처리하는 작업 단위: 앱 + (화면 이름, navigate 단계) 목록 + element partition
+
+    partition=(i, n)이면 element key를 n개로 나눈 것 중 i번째만 테스트 (None이면 전체)
+    """
+
+    def __init__(self, app, screens, partition=None):
+        self.app = app
+        self.screens = screens
+        self.partition = partition
+
+    def __repr__(self):
+        names = [screen for screen, _ in self.screens]
+        return f"CrawlTask({self.app.get('package')!r}, screens={names}, partition={self.partition})"
+
+
+class TaskResult:
+    def __init__(self, task, endpoint, error=None):
+        self.task = task
+        self.endpoint = endpoint
+        self.error = error
+
+    @property
+    def ok(self):
+        return self.error is None
+
+
+# 앱 단위로 나누기: 한 worker가 앱의 모든 화면을 순서대로 테스트
+def partition_by_app(apps) -> list[CrawlTask]:
+    return [CrawlTask(app, list(iter_screens(app))) for app in apps]
+
+
+# (화면, element partition) 단위로 나누기: 화면 하나를 parts개(보통 디바이스 수)의 작업으로
+# element는 목록 안의 위치가 아니라 element key의 hash로 나눔
+# -> 디바이스마다 hierarchy 순서가 달라도 같은 element는 항상 같은 작업에 속함 (누락 / 중복 없음)
+def partition_by_screen(apps, parts=2) -> list[CrawlTask]:
+    tasks = []
+    for app in apps:
+        for screen, navigate in iter_screens(app):
+            for i in range(parts):
+                tasks.append(CrawlTask(app, [(screen, navigate)], (i, parts)))
+    return tasks
+
+
+class CrawlScheduler:
+    """여러 디바이스(Appium 세션)에 crawl 작업을 나눠서 병렬로 실행
+
+    디바이스마다 worker thread 하나가 공유 queue에서 작업을 꺼내 자신의 UIActionAutomator로 실행.
+    automator는 worker / 앱마다 하나를 만들어 작업 사이에 재사용하고, DataSaver는 디바이스마다 하나.
+    결과는 모두 같은 dataset/ 구조에 저장되고 index 충돌은 DataSaver에서 처리.
+    세션은 SessionPool이 디바이스마다 하나씩 유지하고 작업 사이에 재사용 (세션이 죽으면 자동 복구).
+    driver_factory / automator_factory를 주입하면 fake driver로 테스트 가능
+    """
+
+    def __init__(self, endpoints, driver_factory=create_driver, automator_factory=None, base_dir="dataset",
+                 session_pool=None):
+        if not endpoints:
+            raise ValueError("endpoint가 최소 1개 필요합니다.")
+        self.endpoints = list(endpoints)
+        self.driver_factory = driver_factory
+        self.session_pool = session_pool or SessionPool(driver_factory)
+        self.automator_factory = automator_factory or self._default_automator
+        self.base_dir = base_dir
+        # 모든 worker가 같은 상태 그래프를 공유 -> 다른 디바이스가 이미 테스트한 edge도 건너뜀
+        self.state_graph = StateGraph(os.path.join(base_dir, "state_graph.jsonl"))
+        # dataset 학습은 한 번만 하고 모든 worker가 같은 model을 공유 (관찰 결과도 같이 누적)
+        self.element_scheduler = ElementScheduler(ChangeYieldModel.from_sources(base_dir, self.state_graph))
+        self.results = []
+        self._data_savers = {}  # driver(디바이스 세션) -> DataSaver
+        self._lock = threading.Lock()
+
+    def _default_automator(self, driver):
+        with self._lock:
+            data_saver = self._data_savers.get(driver)
+            if data_saver is None:
+                data_saver = self._data_savers[driver] = DataSaver(self.base_dir, write_behind=True)
+        return UIActionAutomator(
+            driver, data_saver=data_saver, state_graph=self.state_graph, element_scheduler=self.element_scheduler
+        )
+
+    # automators: 이 worker가 앱별로 만든 automator (다음 작업에서 재사용)
+    def _run_task(self, endpoint, task, automators):
+        # 세션은 닫지 않고 다음 작업에서 재사용 (run() 끝에서 한 번에 종료)
+        driver = self.session_pool.acquire(endpoint, task.app)
+        package = task.app.get("package")
+        if package not in automators:
+            automators[package] = self.automator_factory(driver)
+        for _, navigate in task.screens:
+            automators[package].run_test_on_ui_elements(partition=task.partition, navigate_steps=navigate)
+
+    def _worker(self, endpoint, tasks):
+        automators = {}
+        while True:
+            try:
+                task = tasks.get_nowait()
+            except queue.Empty:
+                return
+
+            logger.info("📱 [%s] 작업 시작: %s", endpoint.device_name, task)
+            try:
+                self._run_task(endpoint, task, automators)
+                result = TaskResult(task, endpoint)
+            except Exception as e:
+                logger.exception("⚠️ [%s] 작업 실패: %s (%s)", endpoint.device_name, task, e)
+                result = TaskResult(task, endpoint, error=e)
+
+            with self._lock:
+                self.results.append(result)
+
+    def run(self, tasks) -> list[TaskResult]:
+        """모든 작업을 디바이스 수만큼의 worker로 실행하고 결과 반환"""
+        task_queue = queue.Queue()
+        for task in tasks:
+            task_queue.put(task)
+
+        self.results = []
+        workers = [
+            threading.Thread(target=self._worker, args=(endpoint, task_queue), name=endpoint.device_name)
+            for endpoint in self.endpoints
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+        self.session_pool.close()
+
+        # write-behind worker 정리
+        for data_saver in self._data_savers.values():
+            data_saver.close()
+        self._data_savers = {}
+
+        return self.results
+
+
+# 사용 예시
+if __name__ == "__main__":
+    from utils.crawl_metrics import configure as configure_metrics
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(threadName)s %(levelname)s %(message)s")
+    # 모든 worker thread의 phase 시간이 같은 histogram에 합쳐짐
+    metrics = configure_metrics("dataset/metrics.jsonl")
+    endpoints = [
+        DeviceEndpoint("emulator-5554", system_port=8200),
+        DeviceEndpoint("emulator-5556", system_port=8201),
+    ]
+    apps = load_config("config.json")
+
+    scheduler = CrawlScheduler(endpoints)
+    results = scheduler.run(partition_by_screen(apps, parts=len(endpoints)))
+    metrics.close()
+
+    failed = [result for result in results if not result.ok]
+    print(f"✅ 완료: {len(results) - len(failed)}개 / ⚠️ 실패: {len(failed)}개")
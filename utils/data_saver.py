@@ -1,99 +1,198 @@
 import os
 import json
-import shutil
-from xml.etree import ElementTree
+import time
+import uuid
+import logging
+import itertools
+from utils.async_writer import AsyncWriter
+from utils.index_allocator import IndexAllocator
+from utils.dataset_shard import ShardWriter, SHARD_EXTENSION
+from utils.blob_store import BlobStore, MANIFEST_FILE
+from utils.crawl_metrics import metrics
+
+logger = logging.getLogger(__name__)
 
 class DataSaver:
-    def __init__(self, base_dir="dataset"):
+    # write_behind=True면 save_sample()의 디스크 쓰기를 background worker에서 수행
+    # use_shards=True면 sample 디렉토리 대신 app/action 별 shard 파일 하나에 append
+    # dedup=True면 스크린샷 / hierarchy를 blobs/에 내용 기준으로 한 번만 저장하고 sample은 참조만 함
+    # compact_hierarchy=False면 simplified hierarchy를 예전 형식(들여쓰기 된 attribute dict 목록)으로 저장
+    def __init__(self, base_dir="dataset", write_behind=False, max_queue=32, workers=2, index_allocator=None,
+                 use_shards=False, dedup=False, compact_hierarchy=True):
         self.base_dir = base_dir
         os.makedirs(self.base_dir, exist_ok=True)
-        self.current_index_dir = None
+        self.index_allocator = index_allocator or IndexAllocator()
+        self.writer = AsyncWriter(max_queue=max_queue, workers=workers) if write_behind else None
+        self.use_shards = use_shards
+        # 같은 초에 만든 DataSaver끼리도 shard 파일이 겹치지 않도록 uuid 포함
+        self.run_id = f"{time.strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:12]}"
+        self._shard_writers = {}
+        self._shard_sequence = itertools.count()
+        self.blob_store = BlobStore(base_dir) if dedup else None
+        self.compact_hierarchy = compact_hierarchy
 
     def get_action_dir(self, app_name, action):
         """현재 액션(action)에 대한 폴더 경로를 반환"""
         return os.path.join(self.base_dir, app_name, action)
     
     def get_next_index_dir(self, app_name, action):
-        """새로운 index 디렉토리를 생성하고 경로 저장"""
+        """새로운 index 디렉토리를 생성하고 경로 반환"""
         action_dir = self.get_action_dir(app_name, action)
         os.makedirs(action_dir, exist_ok=True)
 
-        existing_indices = [
-            int(folder) for folder in os.listdir(action_dir) if folder.isdigit()
-        ]
-        
-        next_index = (max(existing_indices) + 1) if existing_indices else 0
-        self.current_index_dir = os.path.join(action_dir, str(next_index))
-        os.makedirs(self.current_index_dir, exist_ok=True)
-        
-        return self.current_index_dir
-
-    # 0부터 시작하는 index를 action 하위 폴더로 생성
-    def get_save_path(self, stage, extension):
-        """현재 index 디렉토리에 저장할 파일 경로 반환"""
-        if not self.current_index_dir:
-            raise ValueError("prepare_new_index_dir()를 먼저 호출해야 합니다.")
-        
-        return os.path.join(self.current_index_dir, f"{stage}.{extension}")
-
-    # 스크린샷 저장
-    def save_screenshot(self, driver, app_name, action, stage):
-        """스크린샷 저장"""
-        if stage == "before":
-            self.get_next_index_dir(app_name, action)
-
-        path = self.get_save_path(stage, "png")
-        driver.get_screenshot_as_file(path)
-        print(f"📸 스크린샷 저장됨: {path}")
-        return path
-
-    # view hierarchy -> xml 파일로 저장
-    def save_view_hierarchy(self, driver, app_name, action, stage):
-        path = self.get_save_path(stage, "xml")
-        xml_data = driver.page_source
-        with open(path, "w", encoding="utf-8") as f:
-            f.write(xml_data)
-        print(f"📂 View Hierarchy 저장됨: {path}")
-        return path
-
-    # simplified view hierarchy -> json 파일로 저장
-    def save_simplified_view_hierarchy(self, driver, app_name, action, stage):
-        path = self.get_save_path(stage, "json")
-        xml_data = driver.page_source
-        root = ElementTree.fromstring(xml_data)
-
-        elements = []
-        for node in root.iter():
-            # print(node.tag, node.attrib, node.text)
-            element = node.attrib
-            
-            elements.append(element)
+        # counter 파일 기반 allocator로 O(1) 발급 (process 간에도 안전)
+        # allocator를 쓰지 않는 writer가 먼저 만든 index면 다시 발급
+        while True:
+            index_dir = os.path.join(action_dir, str(self.index_allocator.allocate(action_dir)))
+            try:
+                os.mkdir(index_dir)
+                break
+            except FileExistsError:
+                continue
 
-        with open(path, "w", encoding="utf-8") as f:
-            json.dump(elements, f, indent=4)
-        print(f"📂 Simplified View Hierarchy 저장됨: {path}")
-        
-        return path
-
-    # action_data -> json 파일로 저장
-    def save_action_data(self, app_name, action, element_id, bounds):
-        path = self.get_save_path("action", "json")
+        return index_dir
+
+    # extra: 변화 감지 결과 등 action.json에 함께 남길 값
+    def _action_metadata(self, action, element_id, bounds, settle_time=None, extra=None):
         metadata = {
             "action": action,
             "element_id": element_id,
             "bounds": bounds,
         }
+        # 액션 후 화면이 안정될 때까지 실제로 기다린 시간 (초)
+        if settle_time is not None:
+            metadata["settle_time"] = settle_time
+        if extra:
+            metadata.update(extra)
+        return metadata
+
+    # 파일 쓰기 (경로를 직접 받으므로 background worker에서도 호출 가능)
+    def _write_screenshot(self, path, screenshot):
+        screenshot.save(path)
+        logger.debug("📸 스크린샷 저장됨: %s", path)
+
+    def _write_view_hierarchy(self, path, snapshot):
+        with metrics.span("serialize_xml"), open(path, "w", encoding="utf-8") as f:
+            f.write(snapshot.xml_source)
+        logger.debug("📂 View Hierarchy 저장됨: %s", path)
+
+    def _write_simplified_view_hierarchy(self, path, snapshot):
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(self._simplified_json(snapshot))
+        logger.debug("📂 Simplified View Hierarchy 저장됨: %s", path)
+
+    # 기본은 compact 형식 (utils.compact_hierarchy), 읽을 때는 load_simplified로 두 형식 모두 지원
+    def _simplified_json(self, snapshot) -> str:
+        with metrics.span("serialize_json"):
+            if self.compact_hierarchy:
+                return snapshot.compact.dumps()
+            return json.dumps(snapshot.simplified_elements(), indent=4)
+
+    def _write_action_data(self, path, metadata):
         with open(path, "w", encoding="utf-8") as f:
             json.dump(metadata, f, indent=4)
-        print(f"📜 액션 데이터 저장됨: {path}")
-        return path
-
-    def delete_data(self, app_name, action):
-        """현재 작업 중인 디렉토리 삭제"""
-        if self.current_index_dir and os.path.exists(self.current_index_dir):
-            shutil.rmtree(self.current_index_dir)
-            print(f"🗑️ 변화 없음 -> 폴더 삭제: {self.current_index_dir}")
-            self.current_index_dir = None
+        logger.debug("📜 액션 데이터 저장됨: %s", path)
+
+    # sample 하나의 디스크 쓰기 전체 (serialize 포함) 시간을 write_sample로 측정
+    def _write_sample(self, index_dir, captures, metadata):
+        with metrics.span("write_sample"):
+            self._write_sample_files(index_dir, captures, metadata)
+
+    def _write_sample_files(self, index_dir, captures, metadata):
+        if self.blob_store is not None:
+            self._write_deduplicated_sample(index_dir, captures, metadata)
+            return
+
+        for stage, screenshot, snapshot in captures:
+            self._write_screenshot(os.path.join(index_dir, f"{stage}.png"), screenshot)
+            self._write_view_hierarchy(os.path.join(index_dir, f"{stage}.xml"), snapshot)
+            self._write_simplified_view_hierarchy(os.path.join(index_dir, f"{stage}.json"), snapshot)
+        self._write_action_data(os.path.join(index_dir, "action.json"), metadata)
+
+    # action.json만 sample 디렉토리에 쓰고 나머지는 blob ref 목록(blobs.json)으로 저장
+    def _write_deduplicated_sample(self, index_dir, captures, metadata):
+        fields = self._sample_fields(captures, metadata)
+        self._write_action_data(os.path.join(index_dir, "action.json"), metadata)
+        del fields["action.json"]
+
+        manifest = {
+            name: self.blob_store.put(data, os.path.splitext(name)[1])
+            for name, data in fields.items()
+        }
+        path = os.path.join(index_dir, MANIFEST_FILE)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=4)
+        logger.debug("♻️ Blob 참조 저장됨: %s", path)
+
+    # shard에 넣을 sample: 파일 이름 -> bytes (디렉토리 구조와 같은 이름 사용)
+    def _sample_fields(self, captures, metadata) -> dict:
+        fields = {}
+        for stage, screenshot, snapshot in captures:
+            fields[f"{stage}.png"] = screenshot.png
+            with metrics.span("serialize_xml"):
+                fields[f"{stage}.xml"] = snapshot.xml_source.encode("utf-8")
+            fields[f"{stage}.json"] = self._simplified_json(snapshot).encode("utf-8")
+        fields["action.json"] = json.dumps(metadata, indent=4).encode("utf-8")
+        return fields
+
+    # 실행(run) 당 app/action 별 shard 파일 하나
+    def get_shard_writer(self, app_name, action) -> ShardWriter:
+        key = (app_name, action)
+        if key not in self._shard_writers:
+            path = os.path.join(self.get_action_dir(app_name, action), self.run_id + SHARD_EXTENSION)
+            self._shard_writers[key] = ShardWriter(path)
+        return self._shard_writers[key]
+
+    def _append_to_shard(self, shard_writer, fields):
+        with metrics.span("write_sample"):
+            shard_writer.append(fields)
+
+    def _save_sample_to_shard(self, app_name, action, captures, metadata, on_saved=None):
+        shard_writer = self.get_shard_writer(app_name, action)
+        fields = self._sample_fields(captures, metadata)
+        key = (shard_writer.path, next(self._shard_sequence))
+        self._run_write(key, self._append_to_shard, (shard_writer, fields), on_saved)
+        return shard_writer.path
+
+    # 파일 쓰기가 끝난 뒤에 on_saved 호출 (write-behind면 worker thread에서)
+    # -> 저장되지 않은 sample의 결과(state graph edge 등)가 먼저 기록되지 않음. 쓰기가 실패하면 호출하지 않음
+    def _run_write(self, key, fn, args, on_saved):
+        def write():
+            fn(*args)
+            if on_saved is not None:
+                on_saved()
+
+        if self.writer is not None:
+            self.writer.submit(key, write)
         else:
-            print("⚠️ 삭제할 폴더가 없습니다.")
+            write()
+
+    # 변화가 감지된 샘플만 한 번에 저장
+    # captures: [(stage, screenshot, snapshot), ...]
+    # write-behind 모드에서는 index 디렉토리만 만들고 파일 쓰기는 queue에 넣음
+    # on_saved: 파일 쓰기가 끝난 뒤 호출할 함수 (write-behind면 worker thread에서)
+    def save_sample(self, app_name, action, captures, element_id, bounds, settle_time=None, extra=None,
+                    on_saved=None):
+        metadata = self._action_metadata(action, element_id, bounds, settle_time, extra)
+        if self.use_shards:
+            return self._save_sample_to_shard(app_name, action, captures, metadata, on_saved)
+
+        index_dir = self.get_next_index_dir(app_name, action)
+        self._run_write(index_dir, self._write_sample, (index_dir, captures, metadata), on_saved)
+        return index_dir
+
+    def flush(self):
+        """write-behind 모드에서 queue에 남은 저장 작업을 모두 완료"""
+        if self.writer is not None:
+            self.writer.flush()
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+        if self.blob_store is not None:
+            logger.info(self.blob_store.report())
+        # shard의 index table / footer 기록
+        for shard_writer in self._shard_writers.values():
+            shard_writer.close()
+        self._shard_writers = {}
         
\ No newline at end of file
@@ -0,0 +1,196 @@
+import io
+import os
+import json
+import logging
+import collections
+from functools import cached_property
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from PIL import Image
+from utils.blob_store import BLOB_DIR, MANIFEST_FILE
+from utils.dataset_shard import ShardReader, SHARD_EXTENSION
+from utils.compact_hierarchy import CompactHierarchy, load_compact, load_simplified
+from utils.state_graph import MEANINGFUL_OUTCOMES
+
+logger = logging.getLogger(__name__)
+
+
+class Sample:
+    """DataSaver가 저장한 sample 하나
+
+    파일은 실제로 접근하는 필드만 읽고 decode 함 (cached_property)
+    디렉토리 / dedup(blobs.json) / shard 어디에 저장되었든 같은 방식으로 접근
+    """
+
+    def __init__(self, app, action, index, base_dir, sample_dir=None, shard=None, shard_index=None):
+        self.app = app
+        self.action = action
+        self.index = index
+        self.base_dir = base_dir
+        self.sample_dir = sample_dir
+        self.shard = shard
+        self.shard_index = shard_index
+
+    def __repr__(self):
+        return f"Sample({self.app!r}, {self.action!r}, {self.index})"
+
+    @cached_property
+    def _manifest(self) -> dict:
+        path = os.path.join(self.sample_dir, MANIFEST_FILE)
+        if not os.path.exists(path):
+            return {}
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def read_bytes(self, name) -> bytes:
+        """sample의 파일 하나를 bytes로 읽기 (예: "before.png", "action.json")"""
+        if self.shard is not None:
+            return self.shard.read_field(self.shard_index, name)
+
+        if name in self._manifest:
+            path = os.path.join(self.base_dir, self._manifest[name])
+        else:
+            path = os.path.join(self.sample_dir, name)
+        with open(path, "rb") as f:
+            return f.read()
+
+    @cached_property
+    def action_data(self) -> dict:
+        return json.loads(self.read_bytes("action.json"))
+
+    # outcome이 있으면 변화 종류로 판단 (media_only / no_op는 keep_unchanged로 저장된 sample)
+    # 예전 sample에는 outcome / 변화 여부가 없음 -> 변화가 있을 때만 저장했으므로 True
+    @property
+    def changed(self) -> bool:
+        if "outcome" in self.action_data:
+            return self.action_data["outcome"] in MEANINGFUL_OUTCOMES
+        return self.action_data.get("view_changed", True) or self.action_data.get("screen_changed", False)
+
+    def image(self, stage) -> np.ndarray:
+        return np.asarray(Image.open(io.BytesIO(self.read_bytes(f"{stage}.png"))).convert("RGB"))
+
+    @cached_property
+    def before_image(self) -> np.ndarray:
+        return self.image("before")
+
+    @cached_property
+    def after_image(self) -> np.ndarray:
+        return self.image("after")
+
+    @cached_property
+    def before_xml(self) -> str:
+        return self.read_bytes("before.xml").decode("utf-8")
+
+    @cached_property
+    def after_xml(self) -> str:
+        return self.read_bytes("after.xml").decode("utf-8")
+
+    # simplified hierarchy: 저장 형식(compact / 예전 형식)과 상관없이 attribute dict 목록
+    @cached_property
+    def before_hierarchy(self) -> list:
+        return load_simplified(self.read_bytes("before.json"))
+
+    @cached_property
+    def after_hierarchy(self) -> list:
+        return load_simplified(self.read_bytes("after.json"))
+
+    # 학습용: dict로 풀지 않은 compact 형식 그대로 (bounds는 정수, boolean은 bitfield, parent로 tree 보존)
+    @cached_property
+    def before_compact(self) -> CompactHierarchy:
+        return load_compact(self.read_bytes("before.json"))
+
+    @cached_property
+    def after_compact(self) -> CompactHierarchy:
+        return load_compact(self.read_bytes("after.json"))
+
+
+class DatasetReader:
+    """dataset/<app>/<action>/ 아래의 sample을 lazy하게 순회하는 reader
+
+    for sample in DatasetReader("dataset").iter_samples(apps=["com.twitter.android"], actions=["tap"]):
+        sample.before_image  # 이 시점에 PNG decode
+    """
+
+    def __init__(self, base_dir="dataset"):
+        self.base_dir = base_dir
+        self._shards = {}
+
+    def _open_shard(self, path) -> ShardReader:
+        if path not in self._shards:
+            self._shards[path] = ShardReader(path)
+        return self._shards[path]
+
+    def _iter_action_samples(self, app, action, action_dir):
+        entries = sorted(os.scandir(action_dir), key=lambda entry: entry.name)
+        indexed = sorted((int(entry.name), entry.path) for entry in entries if entry.name.isdigit() and entry.is_dir())
+        for index, sample_dir in indexed:
+            yield Sample(app, action, index, self.base_dir, sample_dir=sample_dir)
+
+        for entry in entries:
+            if not entry.name.endswith(SHARD_EXTENSION):
+                continue
+            try:
+                shard = self._open_shard(entry.path)
+            except (OSError, ValueError) as e:
+                # 빈 파일 / shard가 아닌 파일은 건너뜀 (close() 되지 않은 shard는 ShardReader가 복구)
+                logger.warning("⚠️ shard를 열 수 없어 건너뜀: %s (%s)", entry.path, e)
+                continue
+            for n in range(len(shard)):
+                index = shard.meta(n).get("index", n)
+                yield Sample(app, action, index, self.base_dir, shard=shard, shard_index=n)
+
+    def iter_samples(self, apps=None, actions=None, changed=None):
+        """조건에 맞는 sample을 순서대로 반환 (파일 내용은 접근할 때 읽음)
+
+        apps / actions: 포함할 앱 패키지 / 액션 이름 목록 (None이면 전체)
+        changed: True / False면 변화 여부로 필터링 (action.json만 읽음)
+        """
+        for app in sorted(os.listdir(self.base_dir)):
+            app_dir = os.path.join(self.base_dir, app)
+            if app == BLOB_DIR or not os.path.isdir(app_dir) or (apps is not None and app not in apps):
+                continue
+            for action in sorted(os.listdir(app_dir)):
+                action_dir = os.path.join(app_dir, action)
+                if not os.path.isdir(action_dir) or (actions is not None and action not in actions):
+                    continue
+                for sample in self._iter_action_samples(app, action, action_dir):
+                    if changed is not None and sample.changed != changed:
+                        continue
+                    yield sample
+
+    def __iter__(self):
+        return self.iter_samples()
+
+    def batches(self, batch_size=32, fields=("before_image", "after_image"), prefetch=2, workers=4, **filters):
+        """batch 단위로 sample 반환, fields는 thread pool에서 미리 읽어 둠
+
+        prefetch개의 batch를 미리 읽기 시작하므로 학습 루프와 파일 I/O가 겹쳐서 진행됨
+        """
+        def load(sample):
+            for field in fields:
+                getattr(sample, field)
+            return sample
+
+        def iter_batches():
+            batch = []
+            for sample in self.iter_samples(**filters):
+                batch.append(sample)
+                if len(batch) == batch_size:
+                    yield batch
+                    batch = []
+            if batch:
+                yield batch
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            pending = collections.deque()
+            for batch in iter_batches():
+                pending.append([executor.submit(load, sample) for sample in batch])
+                if len(pending) > prefetch:
+                    yield [future.result() for future in pending.popleft()]
+            while pending:
+                yield [future.result() for future in pending.popleft()]
+
+    def close(self):
+        for shard in self._shards.values():
+            shard.close()
+        self._shards = {}
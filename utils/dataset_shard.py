@@ -0,0 +1,262 @@
+import os
+import sys
+import json
+import mmap
+import zlib
+import struct
+import logging
+import threading
+from utils.blob_store import BLOB_DIR, MANIFEST_FILE
+
+logger = logging.getLogger(__name__)
+
+# shard 파일 구조
+#   [MAGIC]
+#   [sample 0][sample 1] ...          <- append-only
+#   [index table: (offset u64, length u32) * count]
+#   [footer: index_offset u64, count u64, MAGIC]
+#
+# sample = [header 길이 u32][header json][payload ...]
+#   header = {"fields": {name: [상대 offset, 길이, codec]}, "meta": {...}}
+#
+# index / footer는 close()에서 기록. close() 전에 프로세스가 죽으면 footer가 없으므로
+# sample을 처음부터 순서대로 읽어서 index를 다시 만들고, 끝의 잘린 sample은 버림
+MAGIC = b"GUISHRD1"
+SHARD_EXTENSION = ".shard"
+
+_INDEX_ENTRY = struct.Struct("<QI")
+_FOOTER = struct.Struct("<QQ8s")
+_HEADER_LENGTH = struct.Struct("<I")
+
+CODEC_RAW = 0
+CODEC_ZLIB = 1
+
+# 이미 압축된 포맷은 다시 압축하지 않음
+_RAW_EXTENSIONS = (".png", ".jpg", ".jpeg", ".webp")
+
+
+def _codec_for(name):
+    return CODEC_RAW if name.lower().endswith(_RAW_EXTENSIONS) else CODEC_ZLIB
+
+
+class ShardWriter:
+    """app/action 단위로 sample을 하나의 파일에 append 하는 writer
+
+    기존 shard를 열면 index table을 읽고 그 위치부터 이어서 씀 (footer가 없으면 sample을 scan 해서 복구).
+    index table과 footer는 close()에서 파일 끝에 기록
+    """
+
+    def __init__(self, path, compress_level=6):
+        self.path = path
+        self.compress_level = compress_level
+        self._lock = threading.Lock()
+        self._entries = []
+
+        if os.path.exists(path) and os.path.getsize(path) > 0:
+            self._file = open(path, "r+b")
+            with mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+                index_offset, self._entries = _read_index(buffer, path)
+            # 기존 index/footer(또는 잘린 sample)를 지우고 그 자리부터 append
+            self._file.seek(index_offset)
+            self._file.truncate()
+        else:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            self._file = open(path, "w+b")
+            self._file.write(MAGIC)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def append(self, fields: dict, meta=None) -> int:
+        """sample 하나를 추가하고 shard 안에서의 번호 반환"""
+        payloads = []
+        header_fields = {}
+        offset = 0
+        for name, data in fields.items():
+            codec = _codec_for(name)
+            if codec == CODEC_ZLIB:
+                data = zlib.compress(data, self.compress_level)
+            header_fields[name] = [offset, len(data), codec]
+            payloads.append(data)
+            offset += len(data)
+
+        header = json.dumps({"fields": header_fields, "meta": meta or {}}, separators=(",", ":")).encode("utf-8")
+        record = b"".join([_HEADER_LENGTH.pack(len(header)), header, *payloads])
+
+        with self._lock:
+            sample_offset = self._file.seek(0, os.SEEK_END)
+            self._file.write(record)
+            # process가 죽어도 OS에 넘어간 sample은 남도록 (close() 전이면 reader가 scan으로 복구)
+            self._file.flush()
+            self._entries.append((sample_offset, len(record)))
+            return len(self._entries) - 1
+
+    def close(self):
+        with self._lock:
+            if self._file.closed:
+                return
+            index_offset = self._file.seek(0, os.SEEK_END)
+            self._file.write(b"".join(_INDEX_ENTRY.pack(*entry) for entry in self._entries))
+            self._file.write(_FOOTER.pack(index_offset, len(self._entries), MAGIC))
+            self._file.close()
+
+
+def _read_index(buffer, path):
+    """(index table 위치 = sample 영역의 끝, [(offset, length)]) 반환
+
+    footer가 없거나 깨졌으면 _scan_records로 복구
+    """
+    if buffer[:len(MAGIC)] != MAGIC:
+        raise ValueError(f"shard 파일이 아닙니다: {path}")
+    if len(buffer) >= len(MAGIC) + _FOOTER.size:
+        index_offset, count, magic = _FOOTER.unpack_from(buffer, len(buffer) - _FOOTER.size)
+        if magic == MAGIC and index_offset + count * _INDEX_ENTRY.size + _FOOTER.size == len(buffer):
+            table = buffer[index_offset:index_offset + count * _INDEX_ENTRY.size]
+            return index_offset, list(_INDEX_ENTRY.iter_unpack(table))
+
+    entries = _scan_records(buffer)
+    end = entries[-1][0] + entries[-1][1] if entries else len(MAGIC)
+    logger.warning("⚠️ footer가 없는 shard (close() 되지 않음) -> sample %d개 복구, 잘린 %d bytes 무시: %s",
+                   len(entries), len(buffer) - end, path)
+    return end, entries
+
+
+def _scan_records(buffer) -> list[tuple]:
+    """MAGIC 뒤부터 sample을 순서대로 읽어서 index 재구성 (끝까지 온전히 기록된 sample만)"""
+    entries = []
+    offset = len(MAGIC)
+    while offset + _HEADER_LENGTH.size <= len(buffer):
+        (header_length,) = _HEADER_LENGTH.unpack_from(buffer, offset)
+        start = offset + _HEADER_LENGTH.size
+        if start + header_length > len(buffer):
+            break
+        try:
+            fields = json.loads(buffer[start:start + header_length])["fields"]
+            payload_length = max((relative + length for relative, length, _ in fields.values()), default=0)
+        except (ValueError, KeyError, TypeError):
+            break
+        length = _HEADER_LENGTH.size + header_length + payload_length
+        if offset + length > len(buffer):
+            break
+        entries.append((offset, length))
+        offset += length
+    return entries
+
+
+class ShardReader:
+    """mmap으로 shard를 열어서 N번째 sample에 바로 접근하는 reader
+
+    close() 되지 않은 shard(crawl 중 종료)는 온전히 기록된 sample까지만 읽음
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "rb")
+        try:
+            # 빈 파일은 mmap에서 ValueError
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            self._file.close()
+            raise
+        try:
+            _, self._entries = _read_index(self._mmap, path)
+        except ValueError:
+            self.close()
+            raise
+        self._count = len(self._entries)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return self._count
+
+    def _entry(self, n):
+        if not 0 <= n < self._count:
+            raise IndexError(n)
+        return self._entries[n]
+
+    def header(self, n) -> dict:
+        offset, _ = self._entry(n)
+        (header_length,) = _HEADER_LENGTH.unpack_from(self._mmap, offset)
+        start = offset + _HEADER_LENGTH.size
+        header = json.loads(self._mmap[start:start + header_length])
+        header["_payload_offset"] = start + header_length
+        return header
+
+    def fields(self, n) -> list[str]:
+        return list(self.header(n)["fields"])
+
+    def meta(self, n) -> dict:
+        return self.header(n)["meta"]
+
+    def read_field(self, n, name, header=None) -> bytes:
+        header = header or self.header(n)
+        relative_offset, length, codec = header["fields"][name]
+        start = header["_payload_offset"] + relative_offset
+        data = self._mmap[start:start + length]
+        return zlib.decompress(data) if codec == CODEC_ZLIB else data
+
+    def read_sample(self, n) -> dict:
+        header = self.header(n)
+        return {name: self.read_field(n, name, header) for name in header["fields"]}
+
+    def close(self):
+        self._mmap.close()
+        self._file.close()
+
+
+def convert_dataset(base_dir="dataset", out_dir="dataset_shards"):
+    """기존 dataset/<app>/<action>/<index>/ 구조를 app/action 당 shard 파일 하나로 변환
+
+    python -m utils.dataset_shard [base_dir] [out_dir]
+    """
+    converted = []
+    for app_name in sorted(os.listdir(base_dir)):
+        app_dir = os.path.join(base_dir, app_name)
+        if app_name == BLOB_DIR or not os.path.isdir(app_dir):
+            continue
+        for action in sorted(os.listdir(app_dir)):
+            action_dir = os.path.join(app_dir, action)
+            if not os.path.isdir(action_dir):
+                continue
+            indices = sorted((int(folder) for folder in os.listdir(action_dir) if folder.isdigit()))
+            if not indices:
+                continue
+
+            # DataSaver(use_shards=True)와 같은 위치: <app>/<action>/<run>.shard
+            shard_path = os.path.join(out_dir, app_name, action, "converted" + SHARD_EXTENSION)
+            if os.path.exists(shard_path):
+                os.remove(shard_path)
+            with ShardWriter(shard_path) as writer:
+                for index in indices:
+                    sample_dir = os.path.join(action_dir, str(index))
+                    fields = {}
+                    for filename in sorted(os.listdir(sample_dir)):
+                        with open(os.path.join(sample_dir, filename), "rb") as f:
+                            data = f.read()
+                        if filename != MANIFEST_FILE:
+                            fields[filename] = data
+                            continue
+                        # dedup 된 sample은 blob 내용을 풀어서 저장
+                        for name, ref in json.loads(data).items():
+                            with open(os.path.join(base_dir, ref), "rb") as f:
+                                fields[name] = f.read()
+                    writer.append(fields, meta={"app": app_name, "action": action, "index": index})
+
+            print(f"📦 {action_dir} -> {shard_path} ({len(indices)}개 sample)")
+            converted.append(shard_path)
+    return converted
+
+
+if __name__ == "__main__":
+    convert_dataset(*sys.argv[1:3])
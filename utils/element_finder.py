@@ -1,70 +1,139 @@
 from xml.etree import ElementTree
-from typing import Dict
+from typing import Dict, Optional
+from utils.async_writer import AsyncWriter
+from utils.hierarchy_diff import HierarchyChange, subtree_hashes, diff_hierarchy
+from utils.view_snapshot import ViewSnapshot
+from utils.element_index import (
+    ElementRecord, FLAG_CLICKABLE, FLAG_LONG_CLICKABLE, FLAG_SCROLLABLE, FLAG_SCALABLE,
+    FLAG_PINCH_CLASS
+)
+
+
+def _write_text(path, text):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+
 
 class ElementFinder:
-    def __init__(self, driver):
+    """현재 화면의 hierarchy와 element index를 version 단위로 캐시
+
+    GestureHandler로 gesture를 수행하면 invalidate()로 stale 표시 -> 다음 query 때 다시 가져옴.
+    element index는 snapshot의 streaming parse 결과를 사용하므로 gesture flag가 있는 element만 담김.
+    이전 snapshot은 하나만 보관하고 어떤 subtree가 바뀌었는지는 changed_subtrees()에서 필요할 때
+    두 tree를 파싱해서 계산.
+    debug_path가 주어지면 갱신된 hierarchy를 background로 파일에 기록 (기본: 기록 안 함)
+    """
+
+    def __init__(self, driver, debug_path=None):
         self.driver = driver
+        self.debug_path = debug_path
         self.xml_source = None
-        self.root = None
+        self.snapshot = None
+        self.table = None
+        self.version = 0  # hierarchy가 실제로 바뀐 횟수
+        self.stale = True
+        self._hashes = None
+        self._previous = None  # (snapshot, hashes) 직전 version
+        self._changes = None
+        self._debug_writer = AsyncWriter(max_queue=2, workers=1) if debug_path else None
+
+    # gesture 등으로 화면이 바뀌었을 수 있을 때 호출
+    def invalidate(self) -> None:
+        self.stale = True
 
-    # View Hierachy를 가져와서 view_hierarchy.xml 파일로 저장
+    # View Hierachy를 새로 가져와서 캐시 갱신
     def get_view_hierarchy(self) -> str:
-        self.xml_source = self.driver.page_source
-        with open("view_hierarchy.xml", "w", encoding="utf-8") as f:
-            f.write(self.xml_source)
+        return self.load_snapshot(ViewSnapshot.from_driver(self.driver)).xml_source
+
+    # 이미 가져온 스냅샷(settle-wait 등)으로 캐시 갱신 -> 추가 dump 없음
+    def load_snapshot(self, snapshot: ViewSnapshot) -> ViewSnapshot:
+        self.stale = False
+        if snapshot.xml_source == self.xml_source:
+            return snapshot
+
+        if self.snapshot is not None:
+            self._previous = (self.snapshot, self._hashes)
+        self.xml_source = snapshot.xml_source
+        self.snapshot = snapshot
+        # streaming parse 한 번으로 만든 element index -> 이후 query는 index에서 처리
+        self.table = snapshot.scan.table
+        self._hashes = None
+        self._changes = None
+        self.version += 1
 
-        self.root = ElementTree.fromstring(self.xml_source)
-        return self.xml_source
+        if self._debug_writer is not None:
+            # 최신 hierarchy만 의미가 있으므로 아직 쓰지 않은 이전 기록은 취소
+            self._debug_writer.cancel(self.debug_path)
+            self._debug_writer.submit(self.debug_path, _write_text, self.debug_path, self.xml_source)
+        return snapshot
+
+    # 현재 hierarchy의 전체 tree (처음 접근할 때 파싱)
+    @property
+    def root(self) -> Optional[ElementTree.Element]:
+        return self.snapshot.root if self.snapshot is not None else None
 
     def _ensure_hierarchy_loaded(self) -> None:
-        if self.root is None:
+        if self.snapshot is None or self.stale:
             self.get_view_hierarchy()
 
+    # 직전 version과 비교해서 바뀐 subtree 목록 (처음 가져온 hierarchy면 빈 목록)
+    def changed_subtrees(self) -> list[HierarchyChange]:
+        self._ensure_hierarchy_loaded()
+        if self._previous is None:
+            return []
+        if self._changes is None:
+            previous_snapshot, previous_hashes = self._previous
+            previous_root = previous_snapshot.root
+            if previous_hashes is None:
+                previous_hashes = subtree_hashes(previous_root)
+            if self._hashes is None:
+                self._hashes = subtree_hashes(self.root)
+            self._changes = diff_hierarchy(previous_root, self.root, previous_hashes, self._hashes)
+        return self._changes
+
+    def close(self) -> None:
+        if self._debug_writer is not None:
+            self._debug_writer.close()
+
+    # gesture 조건 조합 query (all_flags 모두 + any_flags 중 하나 이상)
+    def find_records(self, all_flags=0, any_flags=0) -> list[ElementRecord]:
+        self._ensure_hierarchy_loaded()
+        return self.table.query(all_flags=all_flags, any_flags=any_flags)
+
+    # tap 또는 long_press가 가능한 element (bounds / 중심 좌표가 파싱된 record)
+    def find_interactive_records(self) -> list[ElementRecord]:
+        return self.find_records(any_flags=FLAG_CLICKABLE | FLAG_LONG_CLICKABLE)
+
+    def find_interactive_elements(self) -> list[ElementTree.Element]:
+        return [record.node for record in self.find_interactive_records()]
+
+    # (x, y) 위치의 가장 안쪽 element record, 없으면 None
+    def element_at(self, x: int, y: int, any_flags=0) -> Optional[ElementRecord]:
+        self._ensure_hierarchy_loaded()
+        return self.table.element_at(x, y, any_flags=any_flags)
+
     # Gesture에 따라 interactive element 찾기
     # tap, double_tap의 경우 clickable="true"
     def find_tappable_elements(self) -> list[ElementTree.Element]:
-        self._ensure_hierarchy_loaded()
-
-        return [
-            node for node in self.root.iter()
-            if node.attrib.get("clickable") == "true"
-        ]
+        return [record.node for record in self.find_records(all_flags=FLAG_CLICKABLE)]
     
-    # long_press의 경우 "clickable"""="true" and "long_clickable""="true"
+    # long_press의 경우 clickable="true" and long-clickable="true"
     def find_long_pressable_elements(self) -> list[ElementTree.Element]:
-        self._ensure_hierarchy_loaded()
-
-        return [
-            node for node in self.root.iter()
-            if node.attrib.get("clickable") == "true" and 
-            node.attrib.get("long_clickable") == "true"
-        ]
+        return [record.node for record in self.find_records(all_flags=FLAG_CLICKABLE | FLAG_LONG_CLICKABLE)]
     
     # swipe의 경우 scrollable="true"
-    def find_swipeable_elements(self) -> list[ElementTree.Element]:
-        self._ensure_hierarchy_loaded()
+    def find_swipeable_records(self) -> list[ElementRecord]:
+        return self.find_records(all_flags=FLAG_SCROLLABLE)
 
-        return [
-            node for node in self.root.iter()
-            if node.attrib.get("scrollable") == "true"
-        ]
+    def find_swipeable_elements(self) -> list[ElementTree.Element]:
+        return [record.node for record in self.find_swipeable_records()]
     
-    # pinch_zoom의 경우 zoomable="true"
-    def find_pinch_zoomable_elements(self) -> list[ElementTree.Element]:
-        self._ensure_hierarchy_loaded()
-        
-        pinch_zoom_view_classes = {
-            "android.webkit.WebView",
-            "android.widget.ImageView",
-            "com.google.android.gms.maps.MapView",
-            "android.view.ViewGroup"  # 커스텀 구현이 있을 수 있는 ViewGroup
-        }
+    # pinch_zoom의 경우 scalable="true" 또는 pinch zoom이 있을 수 있는 class
+    def find_pinch_zoomable_records(self) -> list[ElementRecord]:
+        return self.find_records(any_flags=FLAG_SCALABLE | FLAG_PINCH_CLASS)
 
-        return [
-            node for node in self.root.iter()
-            if node.attrib.get("scalable") == "true" or
-               node.attrib.get("class") in pinch_zoom_view_classes
-        ]
+    def find_pinch_zoomable_elements(self) -> list[ElementTree.Element]:
+        return [record.node for record in self.find_pinch_zoomable_records()]
 
     def get_element_info(self, element: ElementTree.Element) -> Dict[str, str]:
         return {
@@ -0,0 +1,210 @@
+import glob
+import time
+from xml.etree import ElementTree
+
+FLAG_CLICKABLE = 1 << 0
+FLAG_LONG_CLICKABLE = 1 << 1
+FLAG_SCROLLABLE = 1 << 2
+FLAG_SCALABLE = 1 << 3
+FLAG_PINCH_CLASS = 1 << 4  # pinch zoom을 지원할 수 있는 class
+FLAG_ANIMATED_CLASS = 1 << 5  # 재생 중에도 계속 화면이 바뀌는 class (변화 감지에서 mask 처리)
+
+# 커스텀 구현으로 pinch zoom이 있을 수 있는 class
+PINCH_ZOOM_VIEW_CLASSES = {
+    "android.webkit.WebView",
+    "android.widget.ImageView",
+    "com.google.android.gms.maps.MapView",
+    "android.view.ViewGroup"
+}
+
+# 재생 중에도 계속 화면이 바뀌는 element (동영상, 로딩 표시 등)
+ANIMATED_VIEW_CLASSES = {
+    "android.widget.ProgressBar",
+    "android.widget.VideoView",
+    "android.view.SurfaceView",
+    "android.view.TextureView",
+}
+
+_ATTRIBUTE_FLAGS = (
+    ("clickable", FLAG_CLICKABLE),
+    ("long-clickable", FLAG_LONG_CLICKABLE),
+    ("long_clickable", FLAG_LONG_CLICKABLE),
+    ("scrollable", FLAG_SCROLLABLE),
+    ("scalable", FLAG_SCALABLE),
+)
+
+_GRID_SIZE = 128
+
+
+# "[x1,y1][x2,y2]" -> (x1, y1, x2, y2), 형식이 맞지 않으면 None
+# 고정 형식이므로 regex 없이 split (음수 좌표도 그대로). compact hierarchy는 이 결과로 bounds 문자열을 다시 만듦
+def parse_bounds(bounds):
+    try:
+        left, right = bounds[1:-1].split("][")
+        x1, y1 = left.split(",")
+        x2, y2 = right.split(",")
+        return int(x1), int(y1), int(x2), int(y2)
+    except (TypeError, ValueError):
+        return None
+
+
+class ElementRecord:
+    __slots__ = ("node", "index", "x1", "y1", "x2", "y2", "center_x", "center_y", "area", "flags")
+
+    def __init__(self, node, index, bounds, flags):
+        self.node = node
+        self.index = index
+        self.x1, self.y1, self.x2, self.y2 = bounds
+        self.center_x = (self.x1 + self.x2) // 2
+        self.center_y = (self.y1 + self.y2) // 2
+        self.area = (self.x2 - self.x1) * (self.y2 - self.y1)
+        self.flags = flags
+
+    @property
+    def bounds(self):
+        return self.x1, self.y1, self.x2, self.y2
+
+    def contains(self, x, y) -> bool:
+        return self.x1 <= x < self.x2 and self.y1 <= y < self.y2
+
+    def __repr__(self):
+        return f"ElementRecord({self.node.attrib.get('class')}, {self.bounds}, flags={self.flags:#x})"
+
+
+def node_flags(attrib) -> int:
+    """gesture 관련 attribute -> FLAG_* bitmask"""
+    flags = 0
+    for name, flag in _ATTRIBUTE_FLAGS:
+        if attrib.get(name) == "true":
+            flags |= flag
+    element_class = attrib.get("class")
+    if element_class in PINCH_ZOOM_VIEW_CLASSES:
+        flags |= FLAG_PINCH_CLASS
+    if element_class in ANIMATED_VIEW_CLASSES:
+        flags |= FLAG_ANIMATED_CLASS
+    return flags
+
+
+class ElementTable:
+    """hierarchy를 한 번 순회해서 만든 element index
+
+    bounds / 중심점은 정수로 미리 파싱하고 gesture 관련 attribute는 bitmask로 저장.
+    gesture 조건 조합 query와 좌표 -> element 조회(grid)를 다시 순회하지 않고 처리.
+    root 없이 만들고 add()로 채울 수도 있음 (utils.hierarchy_stream)
+    """
+
+    def __init__(self, root=None):
+        self.records = []
+        self._grid = None
+        if root is not None:
+            for node in root.iter():
+                self.add(node)
+
+    def add(self, node, index=None, bounds=None, flags=None):
+        """bounds가 있는 node를 record로 추가 (index 기본값: 추가된 순서), 추가하지 않았으면 None"""
+        if bounds is None:
+            bounds = parse_bounds(node.attrib.get("bounds"))
+            if bounds is None:
+                return None
+        if flags is None:
+            flags = node_flags(node.attrib)
+        record = ElementRecord(node, len(self.records) if index is None else index, bounds, flags)
+        self.records.append(record)
+        self._grid = None
+        return record
+
+    # 좌표 조회용 grid는 element_at()을 처음 호출할 때 한 번만 생성
+    def _build_grid(self):
+        grid = {}
+        for record in self.records:
+            if record.area <= 0:
+                continue
+            for cell_y in range(record.y1 // _GRID_SIZE, (record.y2 - 1) // _GRID_SIZE + 1):
+                for cell_x in range(record.x1 // _GRID_SIZE, (record.x2 - 1) // _GRID_SIZE + 1):
+                    grid.setdefault((cell_x, cell_y), []).append(record)
+        self._grid = grid
+
+    def __len__(self):
+        return len(self.records)
+
+    def query(self, all_flags=0, any_flags=0) -> list[ElementRecord]:
+        """all_flags를 모두 만족하고 any_flags 중 하나 이상을 만족하는 record (document 순서)"""
+        return [
+            record for record in self.records
+            if record.flags & all_flags == all_flags and (not any_flags or record.flags & any_flags)
+        ]
+
+    def element_at(self, x, y, any_flags=0):
+        """(x, y)를 포함하는 가장 작은(가장 안쪽) element, 없으면 None"""
+        if self._grid is None:
+            self._build_grid()
+        best = None
+        for record in self._grid.get((x // _GRID_SIZE, y // _GRID_SIZE), ()):
+            if any_flags and not record.flags & any_flags:
+                continue
+            if record.contains(x, y) and (best is None or record.area <= best.area):
+                best = record
+        return best
+
+
+def _scan_element_at(root, x, y):
+    # index 없이 좌표 조회: 모든 node의 bounds를 매번 파싱
+    best, best_area = None, None
+    for node in root.iter():
+        bounds = parse_bounds(node.attrib.get("bounds"))
+        if bounds is None:
+            continue
+        x1, y1, x2, y2 = bounds
+        area = (x2 - x1) * (y2 - y1)
+        if x1 <= x < x2 and y1 <= y < y2 and (best is None or area <= best_area):
+            best, best_area = node, area
+    return best
+
+
+def benchmark(pattern="dataset/*/*/*/*.xml", repeat=10, lookups=20):
+    """화면 하나 당 crawl 작업량(gesture query 4개 + interactive query + bounds 파싱 + 좌표 조회)을
+    기존 방식(query마다 root.iter() 전체 scan)과 index 방식으로 비교"""
+    roots = [ElementTree.parse(path).getroot() for path in sorted(glob.glob(pattern))]
+    points = [(x, y) for x, y in zip(range(0, 1440, 1440 // lookups), range(0, 3120, 3120 // lookups))]
+
+    def scan(root):
+        tappable = [node for node in root.iter() if node.attrib.get("clickable") == "true"]
+        [node for node in root.iter() if node.attrib.get("long-clickable") == "true"]
+        [node for node in root.iter() if node.attrib.get("scrollable") == "true"]
+        [node for node in root.iter() if node.attrib.get("scalable") == "true" or node.attrib.get("class") in PINCH_ZOOM_VIEW_CLASSES]
+        interactive = [node for node in root.iter() if node.attrib.get("clickable") == "true" or node.attrib.get("long-clickable") == "true"]
+        [parse_bounds(node.attrib.get("bounds")) for node in tappable + interactive]
+        for x, y in points:
+            _scan_element_at(root, x, y)
+
+    def indexed(root):
+        table = ElementTable(root)
+        table.query(all_flags=FLAG_CLICKABLE)
+        table.query(all_flags=FLAG_LONG_CLICKABLE)
+        table.query(all_flags=FLAG_SCROLLABLE)
+        table.query(any_flags=FLAG_SCALABLE | FLAG_PINCH_CLASS)
+        [record.bounds for record in table.query(any_flags=FLAG_CLICKABLE | FLAG_LONG_CLICKABLE)]
+        for x, y in points:
+            table.element_at(x, y)
+
+    results = {}
+    for name, fn in (("기존 scan", scan), ("index", indexed)):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            for root in roots:
+                fn(root)
+        results[name] = (time.perf_counter() - start) / (repeat * len(roots))
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        tables = [ElementTable(root) for root in roots]
+    build_time = (time.perf_counter() - start) / (repeat * len(roots))
+
+    print(f"XML {len(roots)}개, 평균 node {sum(len(t) for t in tables) / max(len(tables), 1):.0f}개, 좌표 조회 {len(points)}회/화면")
+    for name, elapsed in results.items():
+        print(f"{name}: 화면 당 {elapsed * 1000:.2f}ms")
+    print(f"index 생성: 화면 당 {build_time * 1000:.2f}ms")
+
+
+if __name__ == "__main__":
+    benchmark()
@@ -0,0 +1,201 @@
+import os
+import json
+import logging
+import threading
+from utils.dataset_reader import DatasetReader
+from utils.state_graph import MEANINGFUL_OUTCOMES
+
+logger = logging.getLogger(__name__)
+
+# outcome이 없는 예전 sample의 학습 결과 (dataset을 한 번만 읽고 저장, 다시 읽으려면 refresh=True 또는 파일 삭제)
+LEGACY_COUNTS_FILE = "legacy_yield_counts.json"
+
+
+def _feature_keys(action, element_class, resource_id):
+    # 구체적인 key부터: (action, class, resource-id) -> (action, class) -> (action)
+    return (
+        (action, element_class, resource_id),
+        (action, element_class, None),
+        (action, None, None),
+    )
+
+
+class ChangeYieldModel:
+    """action이 의미 있는 변화(새 화면 / dialog / in-place 상태 변화)를 일으킬 확률을 class / resource-id 별로 추정
+
+    관찰 횟수가 적은 key는 더 일반적인 key의 확률 쪽으로 smoothing.
+    (action, class, resource-id) 관찰이 충분하면 그 값을, 아니면 (action, class) / (action) 값을 따름.
+    여러 worker(디바이스)가 하나의 model을 공유해도 됨
+    """
+
+    def __init__(self, prior=0.3, strength=2.0):
+        self.prior = prior
+        self.strength = strength
+        self.counts = {}  # feature key -> [변화 횟수, 시도 횟수]
+        self._lock = threading.Lock()
+
+    def observe(self, action, element_class, resource_id, changed):
+        with self._lock:
+            for key in _feature_keys(action, element_class, resource_id):
+                count = self.counts.setdefault(key, [0, 0])
+                count[0] += int(bool(changed))
+                count[1] += 1
+
+    def probability(self, action, element_class, resource_id) -> float:
+        estimate = self.prior
+        for key in reversed(_feature_keys(action, element_class, resource_id)):
+            hits, tries = self.counts.get(key, (0, 0))
+            estimate = (hits + self.strength * estimate) / (tries + self.strength)
+        return estimate
+
+    def learn_from_state_graph(self, state_graph):
+        """StateGraph에 기록된 모든 시도 (변화 없음 포함)"""
+        for (_, element, action), edge in state_graph.edges.items():
+            element_class, resource_id = (element.split("|", 2) + ["", ""])[:2]
+            self.observe(action, element_class, resource_id, edge["outcome"] in MEANINGFUL_OUTCOMES)
+
+    def learn_from_dataset(self, base_dir, refresh=False):
+        """StateGraph 이전에 저장된 sample (outcome이 없는 sample만, 나머지는 그래프에 이미 있음)
+
+        새로 저장되는 sample에는 항상 outcome이 있으므로 결과가 바뀌지 않음
+        -> 처음 한 번만 dataset을 읽고 LEGACY_COUNTS_FILE에 저장, 이후에는 파일만 읽음
+        """
+        if not os.path.isdir(base_dir):
+            return
+        path = os.path.join(base_dir, LEGACY_COUNTS_FILE)
+        if not refresh and os.path.exists(path):
+            try:
+                with open(path, encoding="utf-8") as f:
+                    counts = {(action, element_class, resource_id): (hits, tries)
+                              for action, element_class, resource_id, hits, tries in json.load(f)["counts"]}
+            except (OSError, ValueError, KeyError) as e:
+                logger.warning("⚠️ %s 읽기 실패 -> dataset에서 다시 학습: %s", path, e)
+            else:
+                self._merge(counts.items())
+                return
+
+        legacy = ChangeYieldModel()
+        reader = DatasetReader(base_dir)
+        try:
+            for sample in reader.iter_samples():
+                try:
+                    action_data = sample.action_data
+                    if "outcome" in action_data:
+                        continue
+                    node = _find_node(sample.before_hierarchy, action_data.get("bounds"))
+                except (OSError, KeyError, ValueError):
+                    continue
+                if node is not None:
+                    legacy.observe(sample.action, node.get("class", ""), node.get("resource-id", ""), sample.changed)
+        except (OSError, ValueError) as e:
+            # dataset을 읽다가 실패해도 지금까지 학습한 것으로 crawl 시작 (automator 생성이 막히지 않게, 저장은 안 함)
+            logger.warning("⚠️ dataset 학습 중단: %s", e)
+        else:
+            legacy.save_counts(path)
+        finally:
+            reader.close()
+        self._merge(legacy.counts.items())
+
+    def _merge(self, counts):
+        with self._lock:
+            for key, (hits, tries) in counts:
+                count = self.counts.setdefault(key, [0, 0])
+                count[0] += hits
+                count[1] += tries
+
+    def save_counts(self, path):
+        """관찰 횟수를 JSON으로 저장 (쓰는 도중 중단되어도 이전 파일은 그대로)"""
+        with self._lock:
+            counts = [[*key, hits, tries] for key, (hits, tries) in self.counts.items()]
+        temp_path = f"{path}.tmp"
+        try:
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump({"counts": counts}, f)
+            os.replace(temp_path, path)
+        except OSError as e:
+            logger.warning("⚠️ %s 저장 실패: %s", path, e)
+
+    @classmethod
+    def from_sources(cls, base_dir=None, state_graph=None, **kwargs) -> "ChangeYieldModel":
+        model = cls(**kwargs)
+        if base_dir is not None:
+            model.learn_from_dataset(base_dir)
+        if state_graph is not None:
+            model.learn_from_state_graph(state_graph)
+        return model
+
+
+# simplified hierarchy에서 bounds가 같은 node (clickable 우선)
+def _find_node(nodes, bounds):
+    matches = [node for node in nodes if node.get("bounds") == bounds]
+    clickable = [node for node in matches if node.get("clickable") == "true"]
+    return (clickable or matches or [None])[-1]
+
+
+def _contains(outer, inner) -> bool:
+    return outer.x1 <= inner.x1 and outer.y1 <= inner.y1 and inner.x2 <= outer.x2 and inner.y2 <= outer.y2
+
+
+class ElementScheduler:
+    """테스트할 (element, action) 순서를 정하는 scheduler
+
+    1) 중복 target 제거: element A 안에 같은 action을 받는 element B가 있고 A의 중심이 B 안에 있으면
+       A에 그 action을 보내도 결국 B가 받으므로 A에서 해당 action을 뺌 (가장 안쪽 element만 남김)
+    2) 학습된 변화 확률이 높은 element / action부터 정렬, min_yield 미만은 뒤로 보냄
+       skip_low_yield=True면 (시간 budget이 있을 때) min_yield 미만은 아예 건너뜀
+    """
+
+    def __init__(self, model=None, min_yield=0.05):
+        self.model = model or ChangeYieldModel()
+        self.min_yield = min_yield
+
+    def dedupe(self, candidates) -> list:
+        """candidates: [(element key, idx, record, actions)] -> 중복 action을 뺀 목록 (action이 없으면 제외)"""
+        kept = []
+        # 작은(안쪽) element부터 보면서 이미 남긴 element를 감싸는 wrapper의 action을 제거
+        for key, idx, record, actions in sorted(candidates, key=lambda candidate: candidate[2].area):
+            remaining = list(actions)
+            for _, _, inner, inner_actions in kept:
+                if not remaining:
+                    break
+                if inner.contains(record.center_x, record.center_y) and _contains(record, inner):
+                    remaining = [action for action in remaining if action not in inner_actions]
+            if remaining:
+                kept.append((key, idx, record, remaining))
+        return sorted(kept, key=lambda candidate: candidate[1])
+
+    def score(self, record, action) -> float:
+        attrib = record.node.attrib
+        return self.model.probability(action, attrib.get("class", ""), attrib.get("resource-id", ""))
+
+    def schedule(self, candidates, skip_low_yield=False) -> list:
+        """중복 제거 후 action은 확률 순, element는 가장 높은 action 확률 순으로 정렬"""
+        scheduled = []
+        for key, idx, record, actions in self.dedupe(candidates):
+            scores = {action: self.score(record, action) for action in actions}
+            ranked = sorted(actions, key=lambda action: -scores[action])
+            if skip_low_yield:
+                ranked = [action for action in ranked if scores[action] >= self.min_yield]
+            if ranked:
+                scheduled.append((scores[ranked[0]], key, idx, record, ranked))
+
+        # 확률 순으로 정렬하되 min_yield 미만인 element는 맨 뒤로
+        scheduled.sort(key=lambda item: (item[0] < self.min_yield, -item[0]))
+        return [(key, idx, record, ranked) for _, key, idx, record, ranked in scheduled]
+
+    def observe(self, record, action, changed):
+        attrib = record.node.attrib
+        self.model.observe(action, attrib.get("class", ""), attrib.get("resource-id", ""), changed)
+
+
+# 사용 예시: dataset과 그래프에서 학습한 확률 상위 key 출력
+if __name__ == "__main__":
+    from utils.state_graph import StateGraph
+
+    model = ChangeYieldModel.from_sources("dataset", StateGraph("dataset/state_graph.jsonl"))
+    ranked = sorted(
+        ((key, hits / tries, tries) for key, (hits, tries) in model.counts.items() if key[2] is not None),
+        key=lambda item: -item[1],
+    )
+    for (action, element_class, resource_id), rate, tries in ranked[:20]:
+        print(f"{action:12s} {rate:.2f} ({tries}회) {element_class} {resource_id}")
@@ -0,0 +1,214 @@
+import random
+from xml.etree import ElementTree
+from selenium.webdriver.remote.command import Command
+from utils.dataset_reader import DatasetReader
+from utils.element_index import parse_bounds
+from utils.screen_fingerprint import ScreenFingerprint
+
+KEYCODE_BACK = 4
+
+# 실제 에뮬레이터에서 측정한 대략적인 지연 시간 (초)
+DEFAULT_LATENCIES = {
+    "page_source": 0.35,
+    "screenshot": 0.25,
+    "gesture": 0.15,
+    "back": 0.1,
+    "launch": 1.5,
+    "animation": 0.4,  # 화면 전환이 끝날 때까지 걸리는 시간 (그 전까지는 이전 화면이 보임)
+    "command": 0.02,   # current_package 등 가벼운 요청
+}
+
+
+class SimClock:
+    """가상 시계: FakeDevice의 지연과 SettleWaiter의 sleep이 모두 여기에 더해짐 (실제로는 기다리지 않음)"""
+
+    def __init__(self, start=0.0):
+        self.now = start
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += max(seconds, 0.0)
+
+
+class Screen:
+    __slots__ = ("screen_id", "xml", "png")
+
+    def __init__(self, screen_id, xml, png):
+        self.screen_id = screen_id
+        self.xml = xml
+        self.png = png
+
+
+class TransitionTable:
+    """dataset/의 before / after 쌍으로 만든 (화면, action, element bounds) -> 다음 화면 표
+
+    화면은 구조 fingerprint로 묶으므로 text만 다른 before 화면들은 같은 화면으로 취급
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.screens = {}      # screen id -> Screen (처음 본 XML / PNG)
+        self.transitions = {}  # screen id -> [(action, (x1, y1, x2, y2), 다음 screen id)]
+        self.start = None
+
+    def _add_screen(self, xml, png) -> str:
+        screen_id = ScreenFingerprint.from_root(ElementTree.fromstring(xml)).digest
+        if screen_id not in self.screens:
+            self.screens[screen_id] = Screen(screen_id, xml, png)
+        return screen_id
+
+    @classmethod
+    def from_dataset(cls, base_dir="dataset", app=None) -> "TransitionTable":
+        reader = DatasetReader(base_dir)
+        try:
+            samples = list(reader.iter_samples(apps=[app] if app else None))
+            if not samples:
+                raise ValueError(f"{base_dir}에 재생할 sample이 없습니다: {app}")
+            table = cls(app or samples[0].app)
+
+            starts = {}
+            for sample in samples:
+                if sample.app != table.app:
+                    continue
+                before = table._add_screen(sample.before_xml, sample.read_bytes("before.png"))
+                after = table._add_screen(sample.after_xml, sample.read_bytes("after.png"))
+                bounds = parse_bounds(sample.action_data.get("bounds"))
+                if bounds is not None:
+                    table.transitions.setdefault(before, []).append((sample.action, bounds, after))
+                starts[before] = starts.get(before, 0) + 1
+        finally:
+            reader.close()
+
+        # 가장 많이 테스트된 before 화면을 앱 첫 화면으로 사용
+        table.start = max(starts, key=starts.get)
+        return table
+
+    def next_screen(self, screen_id, action, x, y):
+        """(x, y)에 action을 했을 때의 다음 화면 (기록이 없으면 None -> 변화 없음)"""
+        for recorded_action, (x1, y1, x2, y2), after in self.transitions.get(screen_id, ()):
+            if recorded_action == action and x1 <= x < x2 and y1 <= y < y2:
+                return after
+        return None
+
+
+def classify_gesture(payload) -> tuple:
+    """W3C actions payload -> (action 이름, x, y)"""
+    sources = [source for source in payload["actions"] if source.get("type") == "pointer"]
+    if len(sources) > 1:
+        active = [source for source in sources if any(a["type"] == "pointerDown" for a in source["actions"])]
+        if len(active) > 1:
+            first = next(a for a in active[0]["actions"] if a["type"] == "pointerMove")
+            return "pinch_zoom", first["x"], first["y"]
+
+    actions = sources[0]["actions"]
+    x = y = 0
+    start = None
+    downs = 0
+    held = 0
+    moved = 0.0
+    for action in actions:
+        if action["type"] == "pointerMove":
+            if start is not None:
+                moved += abs(action["x"] - x) + abs(action["y"] - y)
+            x, y = action["x"], action["y"]
+        elif action["type"] == "pointerDown":
+            downs += 1
+            start = (x, y)
+        elif action["type"] == "pause" and start is not None:
+            held += action.get("duration", 0)
+
+    if start is None:
+        return "pause", x, y
+    if moved > 20:
+        return "swipe", start[0], start[1]
+    if downs >= 2:
+        return "double_tap", start[0], start[1]
+    if held >= 500:
+        return "long_press", start[0], start[1]
+    return "tap", start[0], start[1]
+
+
+class FakeDevice:
+    """Appium driver 대신 쓰는 결정적인 가짜 디바이스
+
+    TransitionTable을 따라 화면을 바꾸고, 각 요청마다 latencies 만큼 가상 시계를 진행.
+    seed가 같으면 지연 시간 jitter까지 같으므로 결과가 항상 같음.
+    SettleWaiter(clock=device.clock, sleep=device.clock.sleep)와 같이 쓰면 실제로는 기다리지 않음
+    """
+
+    def __init__(self, table, latencies=None, jitter=0.1, seed=0, clock=None):
+        self.table = table
+        self.latencies = {**DEFAULT_LATENCIES, **(latencies or {})}
+        self.jitter = jitter
+        self.random = random.Random(seed)
+        self.clock = clock or SimClock()
+        self.stack = [table.start]
+        self._pending = None  # (화면 전환이 끝나는 시각, 전환 후 stack)
+        self.capabilities = {"appPackage": table.app, "deviceName": "fake-device"}
+        self.current_activity = ".FakeActivity"
+        self.requests = {}  # 요청 종류별 횟수
+
+    def _spend(self, kind):
+        self.requests[kind] = self.requests.get(kind, 0) + 1
+        base = self.latencies.get(kind, 0.0)
+        self.clock.sleep(base * (1 + self.random.uniform(-self.jitter, self.jitter)))
+
+    # 전환 시간이 지났으면 전환 후 화면으로 확정
+    def _apply_pending(self):
+        if self._pending is not None and self.clock() >= self._pending[0]:
+            self.stack = self._pending[1]
+            self._pending = None
+
+    @property
+    def _screen(self) -> Screen:
+        self._apply_pending()
+        return self.table.screens[self.stack[-1]]
+
+    def _transition(self, stack):
+        self._pending = (self.clock() + self.latencies["animation"], stack)
+
+    @property
+    def page_source(self) -> str:
+        self._spend("page_source")
+        return self._screen.xml
+
+    def get_screenshot_as_png(self) -> bytes:
+        self._spend("screenshot")
+        return self._screen.png
+
+    @property
+    def current_package(self) -> str:
+        self._spend("command")
+        return self.table.app
+
+    def execute(self, command, params=None):
+        if command != Command.W3C_ACTIONS:
+            self._spend("command")
+            return {"value": None}
+        self._spend("gesture")
+        action, x, y = classify_gesture(params)
+        current = self._screen.screen_id
+        after = self.table.next_screen(current, action, x, y)
+        if after is not None and after != current:
+            self._transition(self.stack + [after])
+        return {"value": None}
+
+    def press_keycode(self, keycode):
+        self._spend("back")
+        self._apply_pending()
+        if keycode == KEYCODE_BACK and len(self.stack) > 1:
+            self._transition(self.stack[:-1])
+
+    def activate_app(self, package):
+        self._spend("launch")
+        self._pending = None
+        self.stack = [self.table.start]
+
+    def is_app_installed(self, package) -> bool:
+        self._spend("command")
+        return package == self.table.app
+
+    def quit(self):
+        pass
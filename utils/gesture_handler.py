@@ -1,54 +1,188 @@
-from selenium.webdriver.common.actions import interaction
-from selenium.webdriver.common.actions.action_builder import ActionBuilder
-from selenium.webdriver.common.actions.pointer_input import PointerInput
-from selenium.webdriver.common.by import By
-from selenium.webdriver.common.keys import Keys
+import json
+from selenium.webdriver.remote.command import Command
+from utils.crawl_metrics import metrics
+
+POINTER_BUTTON = 0  # touch는 항상 button 0
+
+SWIPE_VELOCITY = 1500  # px/s, 손가락을 멈췄다 떼는 일반 scroll
+FLING_VELOCITY = 8000  # px/s, 빠르게 튕겨서 관성 scroll
+
+# 손가락이 움직이는 방향 (swipe_up이면 손가락이 위로 -> 내용은 아래쪽이 보임)
+SWIPE_DIRECTIONS = {"up": (0, -1), "down": (0, 1), "left": (-1, 0), "right": (1, 0)}
+
+
+# element bounds 안에서 direction 방향으로 fraction 만큼 가로지르는 (start_x, start_y, end_x, end_y)
+def swipe_vector(bounds, direction, fraction=0.6):
+    x1, y1, x2, y2 = bounds
+    dx, dy = SWIPE_DIRECTIONS[direction]
+    center_x, center_y = (x1 + x2) // 2, (y1 + y2) // 2
+    half_x = int((x2 - x1) * fraction / 2) * dx
+    half_y = int((y2 - y1) * fraction / 2) * dy
+    return center_x - half_x, center_y - half_y, center_x + half_x, center_y + half_y
+
+
+def _duration_for(start_x, start_y, end_x, end_y, velocity):
+    return ((end_x - start_x) ** 2 + (end_y - start_y) ** 2) ** 0.5 / velocity
+
+
+def _move(x, y, duration=0.0):
+    return {"type": "pointerMove", "duration": int(duration * 1000), "x": int(x), "y": int(y), "origin": "viewport"}
+
+
+def _down():
+    return {"type": "pointerDown", "duration": 0, "button": POINTER_BUTTON}
+
+
+def _up():
+    return {"type": "pointerUp", "duration": 0, "button": POINTER_BUTTON}
+
+
+def _pause(duration=0.0):
+    return {"type": "pause", "duration": int(duration * 1000)}
+
+
+class GestureBatch:
+    """여러 gesture를 하나의 W3C actions payload로 모으는 builder
+
+    gesture마다 손가락(pointer)별 action 목록을 만들고, compile() 할 때 손가락들의 tick을 맞춰
+    (쓰지 않는 손가락은 0ms pause로 채움) 하나의 payload로 합침 -> perform 1회 = HTTP 요청 1회.
+    gesture 사이에는 gap초 pause가 들어가고, 상태를 들고 있지 않으므로 batch마다 새로 생성해서 사용
+    """
+
+    def __init__(self, gap=0.1):
+        self.gap = gap
+        self.gestures = []  # [(이름, {손가락: [action, ...]})]
+
+    def __len__(self):
+        return len(self.gestures)
+
+    def _add(self, name, tracks):
+        self.gestures.append((name, tracks))
+        return self
+
+    def tap(self, x, y):
+        return self._add("tap", {"finger1": [_move(x, y), _down(), _up()]})
+
+    def long_press(self, x, y, duration=2):
+        return self._add("long_press", {"finger1": [_move(x, y), _down(), _pause(duration), _up()]})
+
+    # velocity(px/s)가 주어지면 duration 대신 거리 / 속도로 이동 시간 결정
+    # hold: 떼기 전에 멈춰 있는 시간 (0이 아니면 관성 scroll 없이 멈춤)
+    def swipe(self, start_x, start_y, end_x, end_y, duration=1, velocity=None, hold=0):
+        if velocity:
+            duration = _duration_for(start_x, start_y, end_x, end_y, velocity)
+        actions = [_move(start_x, start_y), _down(), _move(end_x, end_y, duration)]
+        if hold:
+            actions.append(_pause(hold))
+        actions.append(_up())
+        return self._add("swipe", {"finger1": actions})
+
+    # 빠르게 움직이고 바로 떼서 관성 scroll을 일으킴
+    def fling(self, start_x, start_y, end_x, end_y, velocity=FLING_VELOCITY):
+        return self.swipe(start_x, start_y, end_x, end_y, velocity=velocity)
+
+    # 여러 손가락을 가로로 spacing 간격으로 놓고 같은 방향으로 함께 이동
+    def pan(self, x, y, dx, dy, fingers=2, spacing=100, duration=0.5):
+        offset = (fingers - 1) * spacing / 2
+        tracks = {}
+        for i in range(fingers):
+            start_x = x - offset + i * spacing
+            tracks[f"finger{i + 1}"] = [
+                _move(start_x, y), _down(), _move(start_x + dx, y + dy, duration), _up()
+            ]
+        return self._add("pan", tracks)
+
+    def double_tap(self, x, y, interval=0.1):
+        return self._add("double_tap", {"finger1": [
+            _move(x, y), _down(), _up(), _pause(interval), _down(), _up()
+        ]})
+
+    # 두 손가락을 중심에서 위 / 아래로 동시에 벌리거나(zoom in) 모음(zoom out)
+    def pinch(self, x, y, zoom_in=True, near=50, far=200, duration=0.5):
+        start, end = (near, far) if zoom_in else (far, near)
+        return self._add("pinch_zoom_in" if zoom_in else "pinch_zoom_out", {
+            "finger1": [_move(x, y - start), _down(), _move(x, y - end, duration), _up()],
+            "finger2": [_move(x, y + start), _down(), _move(x, y + end, duration), _up()],
+        })
+
+    def pause(self, duration):
+        return self._add("pause", {"finger1": [_pause(duration)]})
+
+    def compile(self) -> dict:
+        """W3C actions payload (driver.execute(Command.W3C_ACTIONS, payload)에 그대로 전달)"""
+        fingers = sorted({finger for _, tracks in self.gestures for finger in tracks})
+        sequences = {finger: [] for finger in fingers}
+
+        for index, (_, tracks) in enumerate(self.gestures):
+            if index > 0 and self.gap:
+                for finger in fingers:
+                    sequences[finger].append(_pause(self.gap) if finger == fingers[0] else _pause())
+            ticks = max(len(actions) for actions in tracks.values())
+            for finger in fingers:
+                actions = tracks.get(finger, [])
+                sequences[finger].extend(actions)
+                sequences[finger].extend(_pause() for _ in range(ticks - len(actions)))
+
+        return {"actions": [
+            {"type": "pointer", "id": finger, "parameters": {"pointerType": "touch"}, "actions": sequences[finger]}
+            for finger in fingers
+        ]}
+
 
 class GestureHandler:
-    def __init__(self, driver):
+    # listeners: gesture를 수행할 때마다 호출되는 함수 목록 (ElementFinder.invalidate 등)
+    def __init__(self, driver, listeners=None):
         self.driver = driver
-        self.actions = ActionBuilder(driver, mouse=PointerInput(interaction.POINTER_TOUCH, "touch"))
+        self.listeners = list(listeners or [])
+
+    def add_listener(self, listener):
+        self.listeners.append(listener)
+
+    # 새 batch 생성 (gesture를 모은 뒤 perform_batch로 한 번에 전송)
+    def batch(self, gap=0.1) -> GestureBatch:
+        return GestureBatch(gap=gap)
+
+    # batch 전체를 한 번의 요청으로 전송한 뒤 화면이 바뀌었을 수 있음을 알림
+    def perform_batch(self, batch: GestureBatch):
+        if not len(batch):
+            return
+        try:
+            with metrics.span("gesture"):
+                self.driver.execute(Command.W3C_ACTIONS, batch.compile())
+        finally:
+            for listener in self.listeners:
+                listener()
 
     # tap(x, y)
     def perform_tap(self, x, y):
-        self.actions.pointer_action.move_to_location(x, y).pointer_down().pointer_up()
-        self.actions.perform()
+        self.perform_batch(self.batch().tap(x, y))
 
     # long_press(x, y, duration)
     def perform_long_press(self, x, y, duration=2):
-        self.actions.pointer_action.move_to_location(x, y).pointer_down()
-        self.actions.pointer_action.pause(duration)
-        self.actions.pointer_action.pointer_up()
-        self.actions.perform()
+        self.perform_batch(self.batch().long_press(x, y, duration))
 
     # swipe(start_x, start_y, end_x, end_y, duration)
-    def perform_swipe(self, start_x, start_y, end_x, end_y, duration=1):
-        self.actions.pointer_action.move_to_location(start_x, start_y).pointer_down()
-        self.actions.pointer_action.move_to_location(end_x, end_y)
-        self.actions.pointer_action.pointer_up()
-        self.actions.perform()
+    def perform_swipe(self, start_x, start_y, end_x, end_y, duration=1, velocity=None, hold=0):
+        self.perform_batch(self.batch().swipe(start_x, start_y, end_x, end_y, duration, velocity, hold))
 
     # double_tap(x, y)
     def perform_double_tap(self, x, y):
-        # First tap
-        self.actions.pointer_action.move_to_location(x, y).pointer_down().pointer_up()
-        # Second tap
-        self.actions.pointer_action.move_to_location(x, y).pointer_down().pointer_up()
-        self.actions.perform()
+        self.perform_batch(self.batch().double_tap(x, y))
+
+    # fling(start_x, start_y, end_x, end_y, velocity)
+    def perform_fling(self, start_x, start_y, end_x, end_y, velocity=FLING_VELOCITY):
+        self.perform_batch(self.batch().fling(start_x, start_y, end_x, end_y, velocity))
 
     # pinch_zoom(x, y, zoom_in)
-    def perform_pinch_zoom(self, x, y, zoom_in=True):
-        if zoom_in:
-            # Zoom-in (손가락을 중앙에서 바깥으로 이동)
-            self.actions.pointer_action.move_to_location(x, y-50).pointer_down()
-            self.actions.pointer_action.move_to_location(x, y-100).pointer_up()
-            self.actions.pointer_action.move_to_location(x, y+50).pointer_down()
-            self.actions.pointer_action.move_to_location(x, y+100).pointer_up()
-        else:
-            # Zoom-out (손가락을 바깥에서 중앙으로 이동)
-            self.actions.pointer_action.move_to_location(x, y-100).pointer_down()
-            self.actions.pointer_action.move_to_location(x, y-50).pointer_up()
-            self.actions.pointer_action.move_to_location(x, y+100).pointer_down()
-            self.actions.pointer_action.move_to_location(x, y+50).pointer_up()
-            
-        self.actions.perform()
\ No newline at end of file
+    def perform_pinch_zoom(self, x, y, zoom_in=True, near=50, far=200, duration=0.5):
+        self.perform_batch(self.batch().pinch(x, y, zoom_in, near, far, duration))
+
+    # pan(x, y, dx, dy, fingers)
+    def perform_pan(self, x, y, dx, dy, fingers=2, spacing=100, duration=0.5):
+        self.perform_batch(self.batch().pan(x, y, dx, dy, fingers, spacing, duration))
+
+
+# 사용 예시 (디바이스 없이 payload 확인)
+if __name__ == "__main__":
+    batch = GestureBatch().tap(540, 1200).swipe(540, 1600, 540, 800, duration=0.3).pinch(540, 1200)
+    print(json.dumps(batch.compile(), indent=2))
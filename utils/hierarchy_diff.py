@@ -0,0 +1,70 @@
+import hashlib
+
+
+def _node_path(path, index):
+    return f"{path}/{index}" if path else str(index)
+
+
+def subtree_hashes(root) -> dict:
+    """node -> (자기 attribute hash, subtree 전체 hash) (Merkle tree 방식, 한 번의 후위 순회)"""
+    hashes = {}
+    stack = [(root, False)]
+    while stack:
+        node, visited = stack.pop()
+        if not visited:
+            stack.append((node, True))
+            stack.extend((child, False) for child in node)
+            continue
+
+        own = hashlib.blake2b(node.tag.encode("utf-8"), digest_size=8)
+        for name, value in sorted(node.attrib.items()):
+            own.update(f"\0{name}={value}".encode("utf-8"))
+        own = own.digest()
+
+        subtree = hashlib.blake2b(own, digest_size=8)
+        for child in node:
+            subtree.update(hashes[child][1])
+        hashes[node] = (own, subtree.digest())
+    return hashes
+
+
+class HierarchyChange:
+    """바뀐 subtree 하나 (path: root부터의 child index 경로, 예: "0/2/1")"""
+
+    __slots__ = ("path", "old", "new")
+
+    def __init__(self, path, old, new):
+        self.path = path
+        self.old = old
+        self.new = new
+
+    def __repr__(self):
+        node = self.new if self.new is not None else self.old
+        return f"HierarchyChange({self.path or '<root>'}, {node.attrib.get('class', node.tag)})"
+
+
+def diff_hierarchy(old_root, new_root, old_hashes=None, new_hashes=None) -> list[HierarchyChange]:
+    """두 tree를 비교해서 바뀐 가장 바깥쪽 subtree 목록 반환
+
+    subtree hash가 같으면 내려가지 않고, 자기 attribute와 child 개수가 같을 때만 child끼리 비교.
+    그 외에는 해당 node 전체를 바뀐 subtree로 보고함
+    """
+    old_hashes = old_hashes or subtree_hashes(old_root)
+    new_hashes = new_hashes or subtree_hashes(new_root)
+
+    changes = []
+    stack = [("", old_root, new_root)]
+    while stack:
+        path, old, new = stack.pop()
+        old_own, old_subtree = old_hashes[old]
+        new_own, new_subtree = new_hashes[new]
+        if old_subtree == new_subtree:
+            continue
+        if old_own != new_own or len(old) != len(new):
+            changes.append(HierarchyChange(path, old, new))
+            continue
+        stack.extend(
+            (_node_path(path, index), old_child, new_child)
+            for index, (old_child, new_child) in reversed(list(enumerate(zip(old, new))))
+        )
+    return changes
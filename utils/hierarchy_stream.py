@@ -0,0 +1,139 @@
+import hashlib
+from xml.etree import ElementTree
+from utils.compact_hierarchy import CompactHierarchyBuilder
+from utils.element_index import ElementTable, node_flags, parse_bounds, FLAG_ANIMATED_CLASS
+from utils.screen_fingerprint import ScreenFingerprint, _node_token
+
+# parser에 한 번에 넣는 page_source 크기 (문자 수)
+# chunk 하나의 event가 처리될 때까지는 그 안의 node가 모두 살아 있으므로 작게 유지
+CHUNK_SIZE = 8 * 1024
+
+
+class HierarchyScan:
+    """page_source를 한 번 streaming parse 해서 얻은 결과
+
+    table: gesture flag가 있는 element만 담은 ElementTable (record.index = document 순서의 node 번호)
+    fingerprint: ScreenFingerprint.from_root와 같은 값
+    compact: CompactHierarchy (simplified hierarchy 저장용)
+    """
+
+    __slots__ = ("table", "fingerprint", "compact")
+
+    def __init__(self, table, fingerprint, compact):
+        self.table = table
+        self.fingerprint = fingerprint
+        self.compact = compact
+
+    # 변화 감지에서 제외할 애니메이션 element 영역
+    @property
+    def animated_regions(self) -> list[tuple]:
+        return [record.bounds for record in self.table.query(all_flags=FLAG_ANIMATED_CLASS)]
+
+
+def scan_hierarchy(xml_source: str, chunk_size=CHUNK_SIZE) -> HierarchyScan:
+    """ElementTree 전체를 만들지 않고 start / end event로 한 번 순회
+
+    node는 end event에서 부모로부터 떼어내므로 parser가 들고 있는 tree는 현재 경로(깊이)만큼만 남음.
+    element index에 들어가는 node만 attribute를 복사한 자식 없는 Element로 보관
+    """
+    parser = ElementTree.XMLPullParser(events=("start", "end"))
+    table = ElementTable()
+    builder = CompactHierarchyBuilder()
+    tokens = set()
+    # 현재 경로: [(element, node 번호, fingerprint token)]
+    path = [(None, -1, b"")]
+
+    def handle(events):
+        for event, element in events:
+            if event == "start":
+                _, parent, parent_token = path[-1]
+                attrib = element.attrib
+                index = builder.add(parent, attrib)
+                token = _node_token(parent_token, element)
+                tokens.add(token)
+                path.append((element, index, token))
+
+                flags = node_flags(attrib)
+                if flags:
+                    bounds = parse_bounds(attrib.get("bounds"))
+                    if bounds is not None:
+                        table.add(ElementTree.Element(element.tag, dict(attrib)), index, bounds, flags)
+            else:
+                path.pop()
+                parent = path[-1][0]
+                if parent is not None and len(parent) and parent[-1] is element:
+                    del parent[-1]
+
+    for offset in range(0, len(xml_source), chunk_size):
+        parser.feed(xml_source[offset:offset + chunk_size])
+        handle(parser.read_events())
+    parser.close()
+    handle(parser.read_events())
+
+    digest = hashlib.sha1(b"".join(sorted(tokens))).hexdigest()
+    return HierarchyScan(table, ScreenFingerprint(digest, frozenset(tokens)), builder.build())
+
+
+# 가장 큰 dump의 최상위 node를 copies번 반복한 합성 dump (피드를 계속 스크롤한 것 같은 큰 화면)
+def _scaled_source(xml_source, copies) -> str:
+    root = ElementTree.fromstring(xml_source)
+    for child in list(root) * (copies - 1):
+        root.append(child)
+    return ElementTree.tostring(root, encoding="unicode")
+
+
+def benchmark(pattern="dataset/*/*/*/*.xml", largest=5, repeat=10, scales=(1, 10, 50)):
+    """dataset에서 가장 큰 dump들로 기존 방식(fromstring + index / fingerprint / compact 각각 순회)과 streaming 비교
+
+    peak 메모리는 결과(compact / index)를 포함한 값. scales: 가장 큰 dump를 부풀려서 크기에 따른 차이 확인
+    """
+    import os
+    import glob
+    import time
+    import tracemalloc
+    from utils.compact_hierarchy import CompactHierarchy
+
+    paths = sorted(glob.glob(pattern), key=os.path.getsize, reverse=True)[:largest]
+    sources = [open(path, encoding="utf-8").read() for path in paths]
+
+    def tree(xml_source):
+        root = ElementTree.fromstring(xml_source)
+        return ElementTable(root), ScreenFingerprint.from_root(root), CompactHierarchy.from_root(root)
+
+    for name, fn in (("tree", tree), ("stream", scan_hierarchy)):
+        started = time.perf_counter()
+        for _ in range(repeat):
+            for xml_source in sources:
+                fn(xml_source)
+        elapsed = (time.perf_counter() - started) / (repeat * len(sources))
+
+        peaks = []
+        for xml_source in sources:
+            tracemalloc.start()
+            result = fn(xml_source)
+            peaks.append(tracemalloc.get_traced_memory()[1])
+            tracemalloc.stop()
+            del result
+        print(f"{name:6s} 화면 당 {elapsed * 1000:6.2f}ms, peak 메모리 평균 {sum(peaks) / len(peaks) / 1024:7.1f}KB "
+              f"/ 최대 {max(peaks) / 1024:7.1f}KB")
+
+    sizes = ", ".join(f"{len(xml_source) / 1024:.0f}KB" for xml_source in sources)
+    print(f"XML {len(sources)}개 ({sizes})")
+
+    for copies in scales:
+        xml_source = _scaled_source(sources[0], copies)
+        line = []
+        for name, fn in (("tree", tree), ("stream", scan_hierarchy)):
+            tracemalloc.start()
+            started = time.perf_counter()
+            result = fn(xml_source)
+            elapsed = time.perf_counter() - started
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            del result
+            line.append(f"{name} {elapsed * 1000:7.1f}ms / peak {peak / 1024 / 1024:6.1f}MB")
+        print(f"x{copies:<3d} ({len(xml_source) / 1024 / 1024:5.1f}MB): " + ", ".join(line))
+
+
+if __name__ == "__main__":
+    benchmark()
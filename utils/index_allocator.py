@@ -0,0 +1,99 @@
+import os
+import fcntl
+import threading
+
+COUNTER_FILE = ".next_index"
+
+
+class IndexAllocator:
+    """app/action 디렉토리별 sample index를 O(1)로 발급하는 allocator
+
+    action 디렉토리의 counter 파일(.next_index)을 flock으로 잠그고 증가시키므로
+    여러 thread / 여러 process가 동시에 발급해도 index가 겹치지 않음.
+    counter 파일이 없을 때만 한 번 디렉토리를 스캔해서 초기값을 정함.
+    block_size > 1이면 한 번에 그만큼 예약해 두고 메모리에서 발급 (파일 잠금 횟수 감소)
+    """
+
+    def __init__(self, block_size=1):
+        self.block_size = block_size
+        self._lock = threading.Lock()
+        self._reserved = {}  # action_dir -> [next, end)
+
+    # 기존 dataset처럼 counter 파일이 없는 경우에만 호출
+    def _scan_next_index(self, action_dir) -> int:
+        existing_indices = [
+            int(folder) for folder in os.listdir(action_dir) if folder.isdigit()
+        ]
+        return (max(existing_indices) + 1) if existing_indices else 0
+
+    def _reserve(self, action_dir, count) -> int:
+        """counter 파일에서 count개를 예약하고 시작 index 반환"""
+        path = os.path.join(action_dir, COUNTER_FILE)
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            data = os.read(fd, 32).strip()
+            start = int(data) if data else self._scan_next_index(action_dir)
+
+            os.lseek(fd, 0, os.SEEK_SET)
+            os.ftruncate(fd, 0)
+            os.write(fd, str(start + count).encode())
+            os.fsync(fd)
+            return start
+        finally:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+            os.close(fd)
+
+    def allocate(self, action_dir) -> int:
+        with self._lock:
+            next_index, end = self._reserved.get(action_dir, (0, 0))
+            if next_index >= end:
+                next_index = self._reserve(action_dir, self.block_size)
+                end = next_index + self.block_size
+            self._reserved[action_dir] = (next_index + 1, end)
+            return next_index
+
+
+def _stress_worker(action_dir, count, block_size, result_queue):
+    allocator = IndexAllocator(block_size=block_size)
+    result_queue.put([allocator.allocate(action_dir) for _ in range(count)])
+
+
+# 여러 process에서 동시에 발급해서 중복 / 누락이 없는지 확인 (실패하면 AssertionError)
+def stress_test(processes=8, count=500, block_size=1):
+    import shutil
+    import tempfile
+    import multiprocessing
+
+    action_dir = tempfile.mkdtemp()
+    try:
+        result_queue = multiprocessing.Queue()
+        workers = [
+            multiprocessing.Process(target=_stress_worker, args=(action_dir, count, block_size, result_queue))
+            for _ in range(processes)
+        ]
+        for worker in workers:
+            worker.start()
+        results = [result_queue.get(timeout=60) for _ in workers]
+        for worker in workers:
+            worker.join()
+            assert worker.exitcode == 0, f"worker 비정상 종료: exitcode={worker.exitcode}"
+
+        indices = [index for result in results for index in result]
+        assert len(indices) == processes * count, f"발급 개수 {len(indices)} != {processes * count}"
+        assert len(set(indices)) == len(indices), f"중복 index {len(indices) - len(set(indices))}개"
+        # process 하나 안에서는 항상 증가
+        assert all(result == sorted(result) for result in results), "process 안에서 index가 감소함"
+        # process마다 block_size 단위로 예약하므로 전체 범위는 예약한 block 수만큼
+        blocks = -(-count // block_size)
+        assert max(indices) < processes * blocks * block_size, f"예약 범위를 벗어난 index: {max(indices)}"
+        if block_size == 1:
+            assert sorted(indices) == list(range(processes * count)), "빠진 index가 있음"
+    finally:
+        shutil.rmtree(action_dir, ignore_errors=True)
+    print(f"✅ {processes} process x {count}회 발급 (block_size={block_size}): 중복 없음")
+
+
+if __name__ == "__main__":
+    stress_test(block_size=1)
+    stress_test(block_size=16)
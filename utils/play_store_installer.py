@@ -1,69 +1,179 @@
-from appium import webdriver
+import time
+import logging
+import threading
 from appium.webdriver.common.appiumby import AppiumBy
-from appium.options.android import UiAutomator2Options
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-import time
+from utils.session_pool import DeviceEndpoint, create_driver
+
+logger = logging.getLogger(__name__)
+
+PLAY_STORE_APP = {
+    "package": "com.android.vending",  # Play Store 패키지
+    "activity": "com.android.vending.AssetBrowserActivity"  # Play Store 메인 액티비티
+}
+
+STATUS_INSTALLED = "installed"
+STATUS_ALREADY_INSTALLED = "already_installed"
+STATUS_FAILED = "failed"
+STATUS_TIMEOUT = "timeout"
+
 
 class PlayStoreInstaller:
-    def __init__(self):
-        # Appium 설정
-        self.caps = {
-            'platformName': 'Android',
-            'automationName': 'UiAutomator2',
-            'deviceName': 'emulator-5556',  # 에뮬레이터/디바이스 ID
-            'appPackage': 'com.android.vending',  # Play Store 패키지
-            'appActivity': 'com.android.vending.AssetBrowserActivity',  # Play Store 메인 액티비티
-            'noReset': True
-        }
-        self.driver = webdriver.Remote("http://localhost:4723", options=UiAutomator2Options().load_capabilities(self.caps))
-        self.wait = WebDriverWait(self.driver, 20)
-
-    def install_app(self, package_name):
+    """디바이스 한 대의 Play Store 세션으로 여러 앱을 설치
+
+    세션은 한 번만 만들고 close() 전까지 재사용.
+    설치 버튼을 모든 앱에 먼저 누른 뒤(Play Store가 다운로드를 queue에 넣음)
+    is_app_installed를 polling 해서 설치가 끝난 앱부터 완료 처리 -> 고정 sleep 없음
+    """
+
+    def __init__(self, endpoint=None, driver=None, install_timeout=600, poll_interval=2.0,
+                 clock=time.monotonic, sleep=time.sleep):
+        self.endpoint = endpoint or DeviceEndpoint("emulator-5556")
+        self.driver = driver
+        self._owns_driver = driver is None
+        self.install_timeout = install_timeout
+        self.poll_interval = poll_interval
+        self.clock = clock
+        self.sleep = sleep
+
+    def _ensure_driver(self):
+        if self.driver is None:
+            self.driver = create_driver(self.endpoint, PLAY_STORE_APP)
+        return self.driver
+
+    def is_installed(self, package_name) -> bool:
+        return self._ensure_driver().is_app_installed(package_name)
+
+    # 앱 상세 화면 열기: market:// deep link, 실패하면 검색으로 이동
+    def _open_details(self, package_name, wait):
         try:
-            # 검색창 클릭
-            search_box = self.wait.until(
-                EC.presence_of_element_located((AppiumBy.ID, 'com.android.vending:id/search_box_idle_text'))
-            )
-            search_box.click()
-            
-            # 앱 이름 입력
-            search_input = self.wait.until(
-                EC.presence_of_element_located((AppiumBy.ID, 'com.android.vending:id/search_box_text_input'))
-            )
-            search_input.send_keys(package_name)
-            
-            # 검색 실행
-            self.driver.press_keycode(66)  # Enter key
-            
-            # 첫 번째 검색 결과 클릭
-            first_result = self.wait.until(
-                EC.presence_of_element_located((AppiumBy.ID, 'com.android.vending:id/content_container'))
-            )
-            first_result.click()
-            
+            self.driver.execute_script("mobile: deepLink", {
+                "url": f"market://details?id={package_name}",
+                "package": PLAY_STORE_APP["package"],
+            })
+            return
+        except Exception as e:
+            logger.warning("⚠️ deep link 실패, 검색으로 이동: %s", e)
+
+        self.driver.activate_app(PLAY_STORE_APP["package"])
+        # 검색창 클릭
+        wait.until(
+            EC.presence_of_element_located((AppiumBy.ID, 'com.android.vending:id/search_box_idle_text'))
+        ).click()
+        # 앱 이름 입력 후 검색 실행
+        wait.until(
+            EC.presence_of_element_located((AppiumBy.ID, 'com.android.vending:id/search_box_text_input'))
+        ).send_keys(package_name)
+        self.driver.press_keycode(66)  # Enter key
+        # 첫 번째 검색 결과 클릭
+        wait.until(
+            EC.presence_of_element_located((AppiumBy.ID, 'com.android.vending:id/content_container'))
+        ).click()
+
+    def request_install(self, package_name) -> bool:
+        """설치 버튼만 누르고 바로 반환 (완료는 wait_until_installed로 확인)"""
+        self._ensure_driver()
+        wait = WebDriverWait(self.driver, 20)
+        try:
+            self._open_details(package_name, wait)
             # 설치/업데이트 버튼 찾기 및 클릭
-            install_button = self.wait.until(
-                EC.presence_of_element_located((AppiumBy.XPATH, 
+            install_button = wait.until(
+                EC.presence_of_element_located((AppiumBy.XPATH,
                     "//android.widget.Button[@resource-id='com.android.vending:id/buy_button']"))
             )
             install_button.click()
-            
-            # 설치 완료 대기
-            print("앱 설치 중...")
-            time.sleep(30)  # 설치 완료 대기 시간
-            
-            print("설치 완료!")
+            logger.info("📥 [%s] %s 설치 요청", self.endpoint.device_name, package_name)
             return True
-            
         except Exception as e:
-            print(f"설치 중 오류 발생: {str(e)}")
+            logger.warning("⚠️ [%s] %s 설치 요청 실패: %s", self.endpoint.device_name, package_name, e)
             return False
-            
-        finally:
+
+    def wait_until_installed(self, package_names, timeout=None) -> dict:
+        """모든 앱이 설치되거나 timeout이 될 때까지 polling -> {package: status}"""
+        deadline = self.clock() + (self.install_timeout if timeout is None else timeout)
+        pending = list(package_names)
+        results = {}
+        while pending:
+            for package_name in list(pending):
+                if self.is_installed(package_name):
+                    pending.remove(package_name)
+                    results[package_name] = STATUS_INSTALLED
+                    logger.info("✅ [%s] %s 설치 완료", self.endpoint.device_name, package_name)
+            if not pending or self.clock() >= deadline:
+                break
+            self.sleep(self.poll_interval)
+
+        for package_name in pending:
+            results[package_name] = STATUS_TIMEOUT
+            logger.warning("⚠️ [%s] %s 설치 시간 초과", self.endpoint.device_name, package_name)
+        return results
+
+    def install_app(self, package_name) -> bool:
+        return self.install_apps([package_name])[package_name] in (STATUS_INSTALLED, STATUS_ALREADY_INSTALLED)
+
+    def install_apps(self, package_names) -> dict:
+        """이미 설치된 앱은 건너뛰고 나머지를 한꺼번에 요청한 뒤 완료될 때까지 대기"""
+        results = {}
+        requested = []
+        for package_name in dict.fromkeys(package_names):
+            if self.is_installed(package_name):
+                results[package_name] = STATUS_ALREADY_INSTALLED
+                logger.info("⏭️ [%s] %s 이미 설치됨", self.endpoint.device_name, package_name)
+            elif self.request_install(package_name):
+                requested.append(package_name)
+            else:
+                results[package_name] = STATUS_FAILED
+
+        results.update(self.wait_until_installed(requested))
+        return results
+
+    def close(self):
+        if self.driver is not None and self._owns_driver:
             self.driver.quit()
+        self.driver = None
+
+
+def install_on_devices(package_names, endpoints, installer_factory=PlayStoreInstaller) -> dict:
+    """모든 디바이스에 같은 앱 목록을 동시에 설치 (디바이스마다 thread 하나, 세션 하나)
+
+    반환: {device_name: {package: status}}
+    """
+    results = {}
+    lock = threading.Lock()
+
+    def worker(endpoint):
+        installer = installer_factory(endpoint)
+        try:
+            device_results = installer.install_apps(package_names)
+        except Exception as e:
+            logger.exception("⚠️ [%s] 설치 중 오류 발생: %s", endpoint.device_name, e)
+            device_results = {package_name: STATUS_FAILED for package_name in package_names}
+        finally:
+            installer.close()
+        with lock:
+            results[endpoint.device_name] = device_results
+
+    threads = [
+        threading.Thread(target=worker, args=(endpoint,), name=f"installer-{endpoint.device_name}")
+        for endpoint in endpoints
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
 
 # 사용 예시
 if __name__ == "__main__":
-    installer = PlayStoreInstaller()
-    installer.install_app("com.twitter.android")
\ No newline at end of file
+    from utils.app_config import load_config
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(threadName)s %(levelname)s %(message)s")
+    packages = [app["package"] for app in load_config("config.json")]
+    endpoints = [
+        DeviceEndpoint("emulator-5554", system_port=8200),
+        DeviceEndpoint("emulator-5556", system_port=8201),
+    ]
+    for device_name, device_results in install_on_devices(packages, endpoints).items():
+        print(f"📱 {device_name}: {device_results}")
@@ -0,0 +1,168 @@
+import io
+import os
+import time
+import logging
+import numpy as np
+from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+# system bar를 가져오지 못했을 때의 기본값: 1440x3120 (560dpi) 기기의 24dp status bar / navigation bar
+# (dataset의 hierarchy: android:id/content가 [0,84][1440,3036], hierarchy height=3036)
+STATUS_BAR_HEIGHT = 84
+NAV_BAR_HEIGHT = 84
+
+
+class DiffResult:
+    """두 화면 비교 결과"""
+
+    def __init__(self, score, bbox, changed):
+        self.score = score      # mask 밖 영역에서 바뀐 pixel 비율 (0~1)
+        self.bbox = bbox        # 바뀐 영역의 bounding box (x1, y1, x2, y2), 원본 해상도 기준
+        self.changed = changed  # score가 threshold를 넘었는지 여부
+
+    def __bool__(self):
+        return self.changed
+
+    def __repr__(self):
+        return f"DiffResult(score={self.score:.4f}, bbox={self.bbox}, changed={self.changed})"
+
+
+class ScreenDiff:
+    """축소 + 그레이스케일 버퍼에서 동작하는 화면 비교 엔진
+
+    원본을 scale 간격으로 샘플링해서 비교하므로 polling 루프 안에서도 호출 가능.
+    status bar / navigation bar / ignore_regions는 mask 처리해서 비교에서 제외.
+    system bar 높이는 from_driver()로 디바이스에서 가져오는 것을 권장
+    """
+
+    def __init__(self, scale=8, grayscale=True, pixel_threshold=16, change_threshold=0.01,
+                 status_bar_height=STATUS_BAR_HEIGHT, nav_bar_height=NAV_BAR_HEIGHT):
+        self.scale = scale
+        self.grayscale = grayscale
+        self.pixel_threshold = pixel_threshold    # pixel 값 차이가 이 값보다 커야 바뀐 것으로 봄 (압축 노이즈 무시)
+        self.change_threshold = change_threshold  # 바뀐 pixel 비율이 이 값을 넘으면 변화 있음
+        self.status_bar_height = status_bar_height
+        self.nav_bar_height = nav_bar_height
+
+    @classmethod
+    def from_driver(cls, driver, **kwargs) -> "ScreenDiff":
+        """디바이스의 실제 status bar / navigation bar 높이로 mask (가져오지 못하면 기본값)"""
+        try:
+            bars = driver.get_system_bars()
+            status_bar, navigation_bar = bars["statusBar"], bars["navigationBar"]
+            kwargs.setdefault("status_bar_height", int(status_bar["height"]) if status_bar.get("visible") else 0)
+            # 가로 화면에서는 navigation bar가 옆에 있으므로 아래쪽 mask 없음
+            bottom = navigation_bar.get("visible") and navigation_bar["width"] >= navigation_bar["height"]
+            kwargs.setdefault("nav_bar_height", int(navigation_bar["height"]) if bottom else 0)
+        except Exception as e:
+            logger.debug("system bar 정보를 가져오지 못함 -> 기본값 사용: %s", e)
+        return cls(**kwargs)
+
+    # 경로 / PNG bytes / PIL 이미지 / 배열을 축소된 배열로 변환
+    def prepare(self, image) -> np.ndarray:
+        if isinstance(image, (str, os.PathLike)):
+            image = Image.open(image)
+        elif isinstance(image, (bytes, bytearray)):
+            image = Image.open(io.BytesIO(image))
+
+        if isinstance(image, Image.Image):
+            return self._reduce(image)
+
+        array = np.asarray(image)[::self.scale, ::self.scale]
+        if self.grayscale and array.ndim == 3:
+            # ITU-R 601 luma 근사, 정수 연산
+            array = (array[..., 0].astype(np.uint16) * 77 +
+                     array[..., 1].astype(np.uint16) * 150 +
+                     array[..., 2].astype(np.uint16) * 29) >> 8
+        return array.astype(np.int16)
+
+    # 원본 크기의 RGB 배열을 만들지 않고 축소 decode (JPEG는 draft로 decode 단계에서 바로 줄어듦)
+    def _reduce(self, image) -> np.ndarray:
+        mode = "L" if self.grayscale else "RGB"
+        size = (-(-image.width // self.scale), -(-image.height // self.scale))
+        image.draft(mode, size)
+        image = image.convert(mode)
+        if image.size != size:
+            image = image.reduce(max(1, image.width // size[0]))
+        if image.size != size:
+            image = image.resize(size, Image.BILINEAR)
+        return np.asarray(image).astype(np.int16)
+
+    # 축소된 좌표계 기준 비교 대상 mask (True = 비교함)
+    def build_mask(self, shape, ignore_regions=()) -> np.ndarray:
+        height, width = shape[:2]
+        mask = np.ones((height, width), dtype=bool)
+
+        top = -(-self.status_bar_height // self.scale)
+        mask[:top, :] = False
+        if self.nav_bar_height:
+            bottom = self.nav_bar_height // self.scale
+            mask[height - bottom:, :] = False
+
+        for x1, y1, x2, y2 in ignore_regions:
+            mask[y1 // self.scale:-(-y2 // self.scale), x1 // self.scale:-(-x2 // self.scale)] = False
+        return mask
+
+    # prepare()를 거친 배열(int16)은 그대로 사용 -> polling 루프에서 이전 화면을 재사용 가능
+    def compare(self, image1, image2, ignore_regions=()) -> DiffResult:
+        array1 = image1 if isinstance(image1, np.ndarray) and image1.dtype == np.int16 else self.prepare(image1)
+        array2 = image2 if isinstance(image2, np.ndarray) and image2.dtype == np.int16 else self.prepare(image2)
+
+        if array1.shape != array2.shape:
+            # 해상도가 다르면 (회전 등) 전체가 바뀐 것으로 처리
+            height, width = array2.shape[:2]
+            return DiffResult(1.0, (0, 0, width * self.scale, height * self.scale), True)
+
+        # int16으로 빼서 uint8 wrap-around 방지
+        diff = np.abs(array1 - array2)
+        if diff.ndim == 3:
+            diff = diff.max(axis=2)
+        mask = self.build_mask(diff.shape, ignore_regions)
+        changed_pixels = (diff > self.pixel_threshold) & mask
+
+        total = int(mask.sum())
+        count = int(changed_pixels.sum())
+        score = count / total if total else 0.0
+
+        bbox = None
+        if count:
+            rows = np.flatnonzero(changed_pixels.any(axis=1))
+            cols = np.flatnonzero(changed_pixels.any(axis=0))
+            bbox = (int(cols[0]) * self.scale, int(rows[0]) * self.scale,
+                    (int(cols[-1]) + 1) * self.scale, (int(rows[-1]) + 1) * self.scale)
+
+        return DiffResult(score, bbox, score > self.change_threshold)
+
+
+def benchmark(base_dir="dataset", repeat=20):
+    """dataset/의 before/after PNG 쌍으로 decode / prepare / compare 시간 측정"""
+    screen_diff = ScreenDiff()
+    pairs = []
+    for dirpath, _, filenames in os.walk(base_dir):
+        if "before.png" in filenames and "after.png" in filenames:
+            pairs.append((os.path.join(dirpath, "before.png"), os.path.join(dirpath, "after.png")))
+
+    decode_time = prepare_time = compare_time = 0.0
+    for before_path, after_path in pairs:
+        start = time.perf_counter()
+        images = [np.asarray(Image.open(path).convert("RGB")) for path in (before_path, after_path)]
+        decode_time += time.perf_counter() - start
+
+        start = time.perf_counter()
+        arrays = [screen_diff.prepare(image) for image in images]
+        prepare_time += time.perf_counter() - start
+
+        start = time.perf_counter()
+        for _ in range(repeat):
+            result = screen_diff.compare(*arrays)
+        compare_time += (time.perf_counter() - start) / repeat
+        print(f"{before_path}: {result}")
+
+    count = max(len(pairs), 1)
+    print(f"\n{len(pairs)}쌍 평균 (ms): decode {decode_time / count * 1000:.2f}, "
+          f"prepare {prepare_time / count * 1000:.2f}, compare {compare_time / count * 1000:.2f}")
+
+
+if __name__ == "__main__":
+    benchmark()
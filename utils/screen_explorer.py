@@ -0,0 +1,142 @@
+import time
+import logging
+from utils.app_config import load_config, iter_screens
+from utils.view_snapshot import ViewSnapshot
+
+logger = logging.getLogger(__name__)
+
+
+class CrawlBudget:
+    """화면 하나에 쓸 수 있는 시간 / 액션 수 제한"""
+
+    def __init__(self, max_actions=None, max_seconds=None, clock=time.monotonic):
+        self.max_actions = max_actions
+        self.max_seconds = max_seconds
+        self.clock = clock
+        self.actions = 0
+        self.started_at = None
+
+    def start(self):
+        self.actions = 0
+        self.started_at = self.clock()
+        return self
+
+    def consume(self, count=1):
+        self.actions += count
+
+    @property
+    def elapsed(self) -> float:
+        return 0.0 if self.started_at is None else self.clock() - self.started_at
+
+    @property
+    def exhausted(self) -> bool:
+        if self.max_actions is not None and self.actions >= self.max_actions:
+            return True
+        if self.max_seconds is not None and self.elapsed >= self.max_seconds:
+            return True
+        return False
+
+
+def _step_key(steps):
+    return tuple((step.get("action", "tap"), step.get("bounds")) for step in steps)
+
+
+class ScreenExplorer:
+    """config.json의 화면 목록을 BFS / DFS 순서로 방문하며 crawl 하는 engine
+
+    화면마다 navigate 단계를 재생해서 이동하고, 이동 후의 fingerprint를 경로(prefix)별로 캐시.
+    다음 화면으로 갈 때는 현재 화면이 목표 경로의 prefix이면 남은 단계만 재생하고,
+    아니면 back으로 알려진 prefix 화면까지 돌아간 뒤 이어서 이동 -> 앱 재실행은 마지막 수단
+    """
+
+    def __init__(self, automator, strategy="bfs", max_actions_per_screen=None, max_seconds_per_screen=None,
+                 max_back_presses=3):
+        if strategy not in ("bfs", "dfs"):
+            raise ValueError(f"지원하지 않는 strategy: {strategy}")
+        self.automator = automator
+        self.strategy = strategy
+        self.max_actions_per_screen = max_actions_per_screen
+        self.max_seconds_per_screen = max_seconds_per_screen
+        self.max_back_presses = max_back_presses
+        self.fingerprints = {}  # 경로(step key) -> 이동 후 화면 fingerprint
+        self.current_path = None
+
+    # navigate 단계가 prefix 관계인 화면들은 tree를 이룸: BFS는 깊이 순, DFS는 부모 바로 뒤에 자식
+    def order_screens(self, app) -> list:
+        screens = list(iter_screens(app))
+        if self.strategy == "bfs":
+            return sorted(screens, key=lambda screen: len(screen[1]))
+        return sorted(screens, key=lambda screen: _step_key(screen[1]))
+
+    def _current_fingerprint(self):
+        return ViewSnapshot.from_driver(self.automator.driver).fingerprint
+
+    def _known_prefix(self, fingerprint, steps):
+        """현재 화면과 일치하는 캐시된 경로 중 steps의 가장 긴 prefix 길이 (없으면 None)"""
+        for length in range(len(steps), -1, -1):
+            cached = self.fingerprints.get(_step_key(steps[:length]))
+            if cached is not None and cached.matches(fingerprint, self.automator.same_screen_threshold):
+                return length
+        return None
+
+    def _replay(self, steps, start):
+        settle = self.automator.navigate(steps[start:])
+        self.current_path = _step_key(steps)
+        # 마지막 navigate 단계의 settle-wait에서 가져온 hierarchy 재사용
+        fingerprint = settle.snapshot.fingerprint if settle is not None else self._current_fingerprint()
+        self.fingerprints[self.current_path] = fingerprint
+
+    def enter(self, steps):
+        """steps 경로의 화면으로 가장 짧은 알려진 경로로 이동"""
+        # 앱 첫 화면(빈 경로)의 fingerprint는 처음 한 번 기록
+        root_key = _step_key([])
+        if root_key not in self.fingerprints and self.current_path in (None, root_key):
+            self.fingerprints[root_key] = self._current_fingerprint()
+
+        for _ in range(self.max_back_presses + 1):
+            prefix = self._known_prefix(self._current_fingerprint(), steps)
+            if prefix is not None:
+                if prefix < len(steps):
+                    logger.debug("🧭 navigate 단계 %d/%d부터 재생", prefix, len(steps))
+                self._replay(steps, prefix)
+                return
+            self.automator.driver.press_keycode(4)
+            self.automator.settle_waiter.wait("back")
+
+        # 알려진 화면으로 돌아가지 못하면 앱 재실행 후 처음부터 이동
+        logger.info("🔄 알려진 화면을 찾지 못함 -> 앱 재실행 후 이동")
+        self.automator.driver.activate_app(self.automator.app_name)
+        self.automator.wait_for_settle("relaunch")
+        self._replay(steps, 0)
+
+    def explore(self, app=None):
+        """앱의 모든 화면을 순서대로 방문하며 crawl"""
+        if app is None:
+            app = {"package": self.automator.app_name, "screens": {"main": {"navigate": []}}}
+
+        for screen_name, steps in self.order_screens(app):
+            budget = CrawlBudget(self.max_actions_per_screen, self.max_seconds_per_screen)
+            logger.info("🗺️ [%s] %s 화면 탐색 시작", app.get("name", app.get("package")), screen_name)
+            self.automator.run_test_on_ui_elements(navigate_steps=steps, budget=budget, navigator=self)
+            logger.info("🗺️ %s 화면 탐색 종료: 액션 %d회, %.1f초", screen_name, budget.actions, budget.elapsed)
+
+
+# 사용 예시
+if __name__ == "__main__":
+    from ui_action_automator import UIActionAutomator
+    from utils.session_pool import DeviceEndpoint, SessionPool
+    from utils.crawl_metrics import configure as configure_metrics
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    metrics = configure_metrics("dataset/metrics.jsonl")
+
+    # 디바이스 세션 하나를 모든 앱에서 재사용 (앱 전환은 activate_app)
+    pool = SessionPool()
+    endpoint = DeviceEndpoint("emulator-5556")
+    try:
+        for app in load_config("config.json"):
+            driver = pool.acquire(endpoint, app)
+            ScreenExplorer(UIActionAutomator(driver), max_actions_per_screen=100, max_seconds_per_screen=1800).explore(app)
+    finally:
+        pool.close()
+        metrics.close()
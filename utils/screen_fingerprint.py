@@ -0,0 +1,58 @@
+import hashlib
+
+# skeleton에 포함하는 attribute (나머지 text / bounds / focused 등은 시간, 스크롤에 따라 변하므로 제외)
+SKELETON_ATTRIBUTES = ("class", "resource-id")
+
+
+def _node_token(parent_token: bytes, node) -> bytes:
+    key = "|".join(node.attrib.get(name, "") for name in SKELETON_ATTRIBUTES) or node.tag
+    return hashlib.blake2b(parent_token + key.encode("utf-8"), digest_size=8).digest()
+
+
+class ScreenFingerprint:
+    """화면 구조(class / resource-id skeleton)의 fingerprint
+
+    각 node를 "조상 경로 + class + resource-id" hash로 바꾼 집합으로 표현.
+    같은 경로의 반복 node(피드 아이템 등)는 하나로 합쳐지므로 스크롤이나 아이템 개수 변화에 영향 없음.
+    digest 비교는 상수 시간, similarity()는 token 집합의 Jaccard 유사도
+    """
+
+    __slots__ = ("digest", "tokens")
+
+    def __init__(self, digest: str, tokens: frozenset):
+        self.digest = digest
+        self.tokens = tokens
+
+    @classmethod
+    def from_root(cls, root) -> "ScreenFingerprint":
+        """파싱된 tree를 한 번 순회해서 fingerprint 생성"""
+        tokens = set()
+        stack = [(root, b"")]
+        while stack:
+            node, parent_token = stack.pop()
+            token = _node_token(parent_token, node)
+            tokens.add(token)
+            stack.extend((child, token) for child in node)
+
+        digest = hashlib.sha1(b"".join(sorted(tokens))).hexdigest()
+        return cls(digest, frozenset(tokens))
+
+    def similarity(self, other: "ScreenFingerprint") -> float:
+        if self.digest == other.digest:
+            return 1.0
+        union = len(self.tokens | other.tokens)
+        return len(self.tokens & other.tokens) / union if union else 1.0
+
+    def matches(self, other: "ScreenFingerprint", threshold=1.0) -> bool:
+        return self.digest == other.digest or (threshold < 1.0 and self.similarity(other) >= threshold)
+
+    def __eq__(self, other):
+        if not isinstance(other, ScreenFingerprint):
+            return NotImplemented
+        return self.digest == other.digest
+
+    def __hash__(self):
+        return hash(self.digest)
+
+    def __repr__(self):
+        return f"ScreenFingerprint({self.digest[:12]}, nodes={len(self.tokens)})"
@@ -0,0 +1,49 @@
+import io
+import numpy as np
+from PIL import Image
+from utils.crawl_metrics import metrics
+
+
+class Screenshot:
+    """메모리에 보관하는 스크린샷
+
+    driver에서 받은 PNG bytes를 그대로 들고 있다가 필요할 때 한 번만 decode.
+    변화 감지는 축소 decode한 배열(thumbnail)로 하고, 저장할 때는 PNG bytes를 다시 인코딩 없이 그대로 씀
+    """
+
+    def __init__(self, png: bytes):
+        self.png = png
+        self._image = None
+        self._array = None
+        self._thumbnail = None  # ((scale, grayscale), 축소 배열)
+
+    @classmethod
+    def from_driver(cls, driver) -> "Screenshot":
+        with metrics.span("screenshot"):
+            return cls(driver.get_screenshot_as_png())
+
+    @property
+    def image(self) -> Image.Image:
+        if self._image is None:
+            with metrics.span("decode"):
+                self._image = Image.open(io.BytesIO(self.png)).convert("RGB")
+        return self._image
+
+    @property
+    def array(self) -> np.ndarray:
+        if self._array is None:
+            self._array = np.asarray(self.image)
+        return self._array
+
+    def thumbnail(self, screen_diff) -> np.ndarray:
+        """screen_diff 비교용 축소 배열 (원본 크기 이미지는 만들어 두지 않음)"""
+        key = (screen_diff.scale, screen_diff.grayscale)
+        if self._thumbnail is None or self._thumbnail[0] != key:
+            with metrics.span("decode"):
+                self._thumbnail = (key, screen_diff.prepare(self.png))
+        return self._thumbnail[1]
+
+    def save(self, path):
+        with open(path, "wb") as f:
+            f.write(self.png)
+        return path
@@ -0,0 +1,224 @@
+import time
+import logging
+import threading
+from appium import webdriver
+from appium.options.android import UiAutomator2Options
+from selenium.common.exceptions import (
+    WebDriverException, NoSuchElementException, StaleElementReferenceException, TimeoutException,
+    InvalidArgumentException, InvalidSelectorException, ElementNotInteractableException,
+)
+from urllib3.exceptions import HTTPError as TransportError
+
+logger = logging.getLogger(__name__)
+
+# 세션 문제가 아니라 호출 자체의 문제인 오류 -> 복구 없이 그대로 전달
+CALLER_ERRORS = (
+    NoSuchElementException, StaleElementReferenceException, TimeoutException,
+    InvalidArgumentException, InvalidSelectorException, ElementNotInteractableException,
+)
+# 세션 / 서버 연결이 끊겼을 수 있는 오류 -> health check 후 복구
+SESSION_ERRORS = (WebDriverException, TransportError, OSError)
+# 다시 호출해도 기기 상태가 바뀌지 않는 읽기 method -> 복구 후 새 세션에서 한 번 다시 호출
+# (page_source / current_activity 등 property는 항상 다시 조회,
+#  gesture / keycode 등은 복구된 세션의 다른 화면에서 재실행되면 안 되므로 복구 후 오류를 그대로 전달)
+IDEMPOTENT_CALLS = frozenset({
+    "get_screenshot_as_png", "get_screenshot_as_base64", "get_screenshot_as_file",
+    "get_window_size", "get_window_rect", "get_system_bars", "query_app_state", "is_app_installed",
+})
+
+
+class DeviceEndpoint:
+    """Appium 서버 + 디바이스 한 대"""
+
+    def __init__(self, device_name, server_url="http://localhost:4723", system_port=None):
+        self.device_name = device_name
+        self.server_url = server_url
+        # 같은 서버에서 여러 디바이스를 돌릴 때 UiAutomator2 systemPort가 겹치면 안 됨
+        self.system_port = system_port
+
+    def __repr__(self):
+        return f"DeviceEndpoint({self.device_name!r}, {self.server_url!r})"
+
+
+def create_driver(endpoint, app):
+    """기본 driver factory: endpoint와 앱 정보로 Appium 세션 생성"""
+    desired_caps = {
+        "platformName": "Android",
+        "automationName": "UiAutomator2",
+        "deviceName": endpoint.device_name,
+        "udid": endpoint.device_name,
+        "appPackage": app["package"],
+        "appActivity": app.get("activity", ""),
+        "autoGrantPermissions": True,
+        "noReset": True
+    }
+    if endpoint.system_port is not None:
+        desired_caps["systemPort"] = endpoint.system_port
+
+    return webdriver.Remote(endpoint.server_url, options=UiAutomator2Options().load_capabilities(desired_caps))
+
+
+class SessionDriver:
+    """Appium driver를 감싸서 세션이 죽으면 다시 연결하고 앱을 다시 띄우는 proxy
+
+    UIActionAutomator / ElementFinder / GestureHandler 등은 이 객체를 일반 driver처럼 사용.
+    호출이 세션 오류로 실패하면 health check 후 새 세션을 만들고, 읽기 호출(IDEMPOTENT_CALLS)만 한 번 다시 호출.
+    gesture 등 나머지 호출은 복구 후 오류를 그대로 전달.
+    recoveries가 바뀌었는지 보고 호출하는 쪽에서 화면 재진입 여부를 결정
+    """
+
+    def __init__(self, endpoint, app, driver_factory=create_driver, health_check_interval=30.0,
+                 max_reconnects=3, clock=time.monotonic):
+        self.endpoint = endpoint
+        self.app = app
+        self.driver_factory = driver_factory
+        self.health_check_interval = health_check_interval
+        self.max_reconnects = max_reconnects
+        self.clock = clock
+        self.recoveries = 0  # 세션 재연결 / 앱 재실행 횟수
+        self._driver = None
+        self._last_check = None
+        self._lock = threading.RLock()
+
+    @property
+    def driver(self):
+        if self._driver is None:
+            self._connect()
+        return self._driver
+
+    def _connect(self):
+        started = self.clock()
+        self._driver = self.driver_factory(self.endpoint, self.app)
+        self._last_check = self.clock()
+        logger.info("🔌 [%s] 세션 생성: %.1f초", self.endpoint.device_name, self._last_check - started)
+
+    # UIActionAutomator는 capabilities의 appPackage로 앱을 구분 -> 현재 앱 기준으로 반환
+    @property
+    def capabilities(self):
+        return {**self.driver.capabilities, "appPackage": self.app["package"]}
+
+    def switch_app(self, app):
+        """같은 세션에서 다른 앱으로 전환 (세션을 새로 만들지 않음)"""
+        with self._lock:
+            self.app = app
+            self._call(lambda: self.driver.activate_app(app["package"]), retry=True)
+
+    def is_healthy(self) -> bool:
+        try:
+            self._driver.current_package
+            return True
+        except Exception:
+            return False
+
+    def ensure_healthy(self, force=False) -> bool:
+        """health_check_interval마다 세션 / 앱 상태 확인, 문제가 있으면 복구 (복구했으면 True)"""
+        with self._lock:
+            if self._driver is None:
+                self._connect()
+                return False
+            if not force and self.clock() - self._last_check < self.health_check_interval:
+                return False
+            self._last_check = self.clock()
+            if not self.is_healthy():
+                self.reconnect()
+                return True
+            # 세션은 살아 있지만 앱이 죽었거나 다른 앱이 떠 있는 경우
+            if self._driver.current_package != self.app["package"]:
+                logger.warning("🔁 [%s] 앱이 foreground가 아님 -> 다시 실행", self.endpoint.device_name)
+                self._driver.activate_app(self.app["package"])
+                self.recoveries += 1
+                return True
+            return False
+
+    def reconnect(self):
+        with self._lock:
+            old, self._driver = self._driver, None
+            if old is not None:
+                try:
+                    old.quit()
+                except Exception:
+                    pass
+
+            for attempt in range(1, self.max_reconnects + 1):
+                try:
+                    self._connect()
+                    self._driver.activate_app(self.app["package"])
+                    self.recoveries += 1
+                    logger.info("🔁 [%s] 세션 복구 완료 (시도: %d)", self.endpoint.device_name, attempt)
+                    return
+                except SESSION_ERRORS as e:
+                    logger.warning("⚠️ [%s] 세션 복구 실패 (시도: %d): %s", self.endpoint.device_name, attempt, e)
+                    self._driver = None
+            raise WebDriverException(f"{self.endpoint.device_name} 세션을 복구하지 못했습니다.")
+
+    # retry=False면 세션만 복구하고 오류를 다시 발생시킴 -> 호출하는 쪽이 recoveries를 보고 화면 이동 후 재시도
+    def _call(self, fn, retry=False):
+        try:
+            return fn()
+        except CALLER_ERRORS:
+            raise
+        except SESSION_ERRORS:
+            with self._lock:
+                if self.is_healthy():
+                    raise
+                self.reconnect()
+            if not retry:
+                raise
+            return fn()
+
+    def __getattr__(self, name):
+        # attribute 조회(page_source 등 property 포함)는 읽기 -> 복구 후 다시 조회
+        value = self._call(lambda: getattr(self.driver, name), retry=True)
+        if not callable(value):
+            return value
+
+        # method는 호출 시점의 (복구 후일 수 있는) driver에서 다시 찾아서 호출
+        def method(*args, **kwargs):
+            return self._call(lambda: getattr(self.driver, name)(*args, **kwargs), retry=name in IDEMPOTENT_CALLS)
+        return method
+
+    def quit(self):
+        with self._lock:
+            if self._driver is not None:
+                try:
+                    self._driver.quit()
+                finally:
+                    self._driver = None
+
+
+class SessionPool:
+    """디바이스마다 warm 세션 하나를 유지하고 작업(앱)이 바뀌어도 재사용
+
+    세션 생성은 5~15초가 걸리므로 작업마다 새로 만들지 않고 activate_app으로 앱만 전환
+    """
+
+    def __init__(self, driver_factory=create_driver, health_check_interval=30.0, max_reconnects=3):
+        self.driver_factory = driver_factory
+        self.health_check_interval = health_check_interval
+        self.max_reconnects = max_reconnects
+        self.sessions = {}  # device name -> SessionDriver
+        self._lock = threading.Lock()
+
+    def acquire(self, endpoint, app) -> SessionDriver:
+        with self._lock:
+            session = self.sessions.get(endpoint.device_name)
+            if session is None:
+                session = SessionDriver(
+                    endpoint, app, self.driver_factory, self.health_check_interval, self.max_reconnects
+                )
+                self.sessions[endpoint.device_name] = session
+                return session
+
+        if session.app.get("package") != app.get("package"):
+            session.switch_app(app)
+        session.ensure_healthy(force=True)
+        return session
+
+    def close(self):
+        with self._lock:
+            sessions, self.sessions = list(self.sessions.values()), {}
+        for session in sessions:
+            try:
+                session.quit()
+            except Exception as e:
+                logger.warning("⚠️ [%s] 세션 종료 중 오류 발생: %s", session.endpoint.device_name, e)
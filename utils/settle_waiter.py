@@ -0,0 +1,99 @@
+import time
+from utils.view_snapshot import ViewSnapshot
+from utils.screenshot import Screenshot
+from utils.screen_diff import ScreenDiff
+from utils.crawl_metrics import metrics
+
+
+class SettleResult:
+    """한 번의 settle-wait 결과"""
+
+    def __init__(self, label, waited, stable, polls, snapshot, screenshot=None):
+        self.label = label
+        self.waited = waited      # 실제로 기다린 시간 (초)
+        self.stable = stable      # timeout 전에 화면이 안정되었는지 여부
+        self.polls = polls        # signal을 확인한 횟수
+        self.snapshot = snapshot  # 마지막으로 가져온 ViewSnapshot (재사용 가능)
+        self.screenshot = screenshot  # 마지막으로 가져온 Screenshot (use_screenshot=False면 None)
+
+    def __repr__(self):
+        return f"SettleResult(label={self.label!r}, waited={self.waited:.2f}, stable={self.stable}, polls={self.polls})"
+
+
+class SettleWaiter:
+    """고정 sleep 대신 화면이 안정될 때까지 기다리는 wait engine
+
+    hierarchy와 screenshot을 polling 하면서 quiet_window 동안 둘 다 변하지 않으면 안정된 것으로 판단.
+    timeout을 넘기면 중단. screenshot은 PNG bytes가 달라졌을 때만 축소 decode해서
+    screen_diff로 비교 (status bar / nav bar / 애니메이션 element 영역은 mask -> 시계나 자동재생 영상 무시).
+    clock / sleep을 주입할 수 있어서 fake driver의 시간표로 테스트 가능
+    """
+
+    def __init__(self, driver, quiet_window=1.0, timeout=10.0, poll_interval=0.25, min_wait=0.0,
+                 use_screenshot=True, screen_diff=None, clock=time.monotonic, sleep=time.sleep):
+        self.driver = driver
+        self.quiet_window = quiet_window
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+        self.min_wait = min_wait
+        self.use_screenshot = use_screenshot
+        self.screen_diff = screen_diff or ScreenDiff()
+        self.clock = clock
+        self.sleep = sleep
+
+    def _capture(self):
+        snapshot = ViewSnapshot.from_driver(self.driver)
+        screenshot = Screenshot.from_driver(self.driver) if self.use_screenshot else None
+        return snapshot, screenshot
+
+    def _changed(self, previous, current) -> bool:
+        (old_snapshot, old_screenshot), (snapshot, screenshot) = previous, current
+        if old_snapshot.xml_source != snapshot.xml_source:
+            return True
+        if screenshot is None or old_screenshot.png == screenshot.png:
+            return False
+        # mask 밖에서 pixel_threshold를 넘는 pixel이 하나라도 있으면 아직 움직이는 중
+        diff = self.screen_diff.compare(
+            old_screenshot.thumbnail(self.screen_diff), screenshot.thumbnail(self.screen_diff),
+            snapshot.scan.animated_regions,
+        )
+        return diff.bbox is not None
+
+    # polling 사이의 sleep만 따로 측정 -> settle 시간 중 실제로 쉰 시간과 캡처 시간을 구분
+    def _sleep(self, seconds):
+        with metrics.span("settle_sleep"):
+            self.sleep(seconds)
+
+    def wait(self, label=None, timeout=None) -> SettleResult:
+        """화면이 quiet_window 동안 변하지 않을 때까지 대기"""
+        with metrics.span("settle"):
+            return self._wait(label, timeout)
+
+    def _wait(self, label, timeout) -> SettleResult:
+        timeout = self.timeout if timeout is None else timeout
+        start = self.clock()
+
+        if self.min_wait > 0:
+            self._sleep(self.min_wait)
+
+        capture = self._capture()
+        last_change = self.clock()
+        polls = 1
+        stable = False
+
+        while True:
+            now = self.clock()
+            if now - last_change >= self.quiet_window:
+                stable = True
+                break
+            if now - start >= timeout:
+                break
+
+            self._sleep(self.poll_interval)
+            new_capture = self._capture()
+            polls += 1
+            if self._changed(capture, new_capture):
+                last_change = self.clock()
+            capture = new_capture
+
+        return SettleResult(label, self.clock() - start, stable, polls, *capture)
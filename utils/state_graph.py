@@ -0,0 +1,114 @@
+import os
+import json
+import zlib
+import threading
+
+OUTCOME_NO_OP = "no_op"
+OUTCOME_NEW_SCREEN = "new_screen"  # 다른 화면으로 이동 (navigation)
+OUTCOME_DIALOG = "dialog"
+OUTCOME_TOGGLE = "toggle"          # 같은 화면에서 상태만 바뀜 (checkbox, 탭 선택, scroll 등)
+OUTCOME_MEDIA = "media_only"       # 동영상 / 애니메이션 영역만 바뀜
+
+# 액션에 의한 의미 있는 변화 (sample로 남기고 변화 확률 학습에 씀)
+MEANINGFUL_OUTCOMES = {OUTCOME_NEW_SCREEN, OUTCOME_DIALOG, OUTCOME_TOGGLE}
+
+# after 화면이 before 화면의 구조를 이 비율 이상 포함하면 위에 뜬 dialog / overlay로 판단
+DIALOG_CONTAINMENT = 0.8
+
+
+def element_key(element) -> str:
+    """element 식별자: class / resource-id / content-desc / bounds"""
+    attrib = element.attrib
+    return "|".join((
+        attrib.get("class", ""),
+        attrib.get("resource-id", ""),
+        attrib.get("content-desc", ""),
+        attrib.get("bounds", ""),
+    ))
+
+
+def element_partition(key, count) -> int:
+    """element key를 count개로 나눴을 때의 번호 (프로세스 / 디바이스가 달라도 같은 값)"""
+    return zlib.crc32(key.encode("utf-8")) % count
+
+
+class StateGraph:
+    """화면 fingerprint를 node, (element, action)을 edge로 하는 상태 전이 그래프
+
+    edge 하나가 기록될 때마다 jsonl 파일에 한 줄씩 append -> crash 이후에도 그대로 이어서 crawl.
+    이미 기록된 (screen, element, action)은 다시 테스트하지 않음
+    """
+
+    def __init__(self, path="dataset/state_graph.jsonl"):
+        self.path = path
+        self.nodes = {}  # screen id -> {"app": ..., "nodes": node 개수}
+        self.edges = {}  # (screen id, element key, action) -> {"outcome": ..., "target": screen id}
+        self._lock = threading.Lock()
+        self._load()
+
+    @staticmethod
+    def screen_id(app_name, fingerprint) -> str:
+        return f"{app_name}:{fingerprint.digest}"
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # crash로 마지막 줄이 잘린 경우
+                    continue
+                self._apply(record)
+
+    def _apply(self, record):
+        if record["type"] == "node":
+            self.nodes[record["screen"]] = {"app": record["app"], "nodes": record["nodes"]}
+        elif record["type"] == "edge":
+            key = (record["screen"], record["element"], record["action"])
+            self.edges[key] = {"outcome": record["outcome"], "target": record.get("target")}
+
+    def _append(self, record):
+        self._apply(record)
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def add_screen(self, app_name, fingerprint) -> str:
+        screen = self.screen_id(app_name, fingerprint)
+        with self._lock:
+            if screen not in self.nodes:
+                self._append({"type": "node", "screen": screen, "app": app_name, "nodes": len(fingerprint.tokens)})
+        return screen
+
+    def is_known(self, screen, element, action) -> bool:
+        return (screen, element, action) in self.edges
+
+    def record(self, screen, element, action, outcome, target=None):
+        with self._lock:
+            self._append({
+                "type": "edge", "screen": screen, "element": element, "action": action,
+                "outcome": outcome, "target": target,
+            })
+
+    def unexplored_actions(self, screen, element, actions) -> list[str]:
+        return [action for action in actions if not self.is_known(screen, element, action)]
+
+    def prioritize(self, screen, candidates, actions=None) -> list:
+        """(element key, ...) 후보를 아직 한 번도 테스트하지 않은 element부터 정렬 (안정 정렬)
+
+        actions가 없으면 각 후보의 마지막 항목을 그 element의 action 목록으로 사용
+        """
+        def explored_count(candidate):
+            element_actions = candidate[-1] if actions is None else actions
+            return len(element_actions) - len(self.unexplored_actions(screen, candidate[0], element_actions))
+        return sorted(candidates, key=explored_count)
+
+    def summary(self) -> dict:
+        outcomes = {}
+        for edge in self.edges.values():
+            outcomes[edge["outcome"]] = outcomes.get(edge["outcome"], 0) + 1
+        return {"screens": len(self.nodes), "edges": len(self.edges), "outcomes": outcomes}
@@ -0,0 +1,63 @@
+from xml.etree import ElementTree
+from utils.screen_fingerprint import ScreenFingerprint
+from utils.crawl_metrics import metrics
+from utils.compact_hierarchy import CompactHierarchy
+from utils.hierarchy_stream import HierarchyScan, scan_hierarchy
+
+
+class ViewSnapshot:
+    """한 번의 page_source 호출로 얻은 View Hierarchy 스냅샷
+
+    XML 저장, simplified JSON 저장, 화면 변화 감지가 모두 같은 스냅샷을 공유함
+    -> 한 stage 당 hierarchy dump는 1회만 수행.
+    element index / fingerprint / compact hierarchy는 streaming parse 한 번(scan)으로 만들고
+    전체 tree(root)는 subtree diff 등 필요할 때만 파싱
+    """
+
+    def __init__(self, xml_source: str):
+        self.xml_source = xml_source
+        self._root = None
+        self._scan = None
+
+    @classmethod
+    def from_driver(cls, driver) -> "ViewSnapshot":
+        with metrics.span("hierarchy_fetch"):
+            return cls(driver.page_source)
+
+    # 파싱은 처음 접근할 때 한 번만 수행
+    @property
+    def root(self) -> ElementTree.Element:
+        if self._root is None:
+            with metrics.span("parse"):
+                self._root = ElementTree.fromstring(self.xml_source)
+        return self._root
+
+    # tree를 만들지 않는 한 번의 streaming parse (처음 접근할 때 한 번만 수행)
+    @property
+    def scan(self) -> HierarchyScan:
+        if self._scan is None:
+            with metrics.span("parse"):
+                self._scan = scan_hierarchy(self.xml_source)
+        return self._scan
+
+    # 화면 구조 fingerprint
+    @property
+    def fingerprint(self) -> ScreenFingerprint:
+        return self.scan.fingerprint
+
+    # simplified view hierarchy (node attribute 목록, 예전 형식)
+    def simplified_elements(self) -> list[dict]:
+        return [dict(node.attrib) for node in self.root.iter()]
+
+    # simplified view hierarchy (compact 형식)
+    @property
+    def compact(self) -> CompactHierarchy:
+        return self.scan.compact
+
+    def __eq__(self, other):
+        if not isinstance(other, ViewSnapshot):
+            return NotImplemented
+        return self.xml_source == other.xml_source
+
+    def __hash__(self):
+        return hash(self.xml_source)